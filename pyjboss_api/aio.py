@@ -0,0 +1,393 @@
+'''
+asyncio counterpart of JbossConnection and Call.
+
+Requires `httpx` (install with `pip install pyjboss_api[async]`). Model tree is built from the same resource
+descriptions and navigated the same way as with JbossConnection, but operations, attribute reads and writes
+and `add()` are coroutines.
+'''
+import asyncio
+from logging import DEBUG
+from time import perf_counter
+from typing import Optional, Union
+from urllib.parse import quote_plus
+from warnings import warn
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .cache import DescriptionCache, ReadCache
+from .codec import JsonCodec, get_codec
+from .core import ATTR_TYPES, Call, JbossConnection, Model, PathIndex, _apply_refresh, _is_detached, _loaded_models, Operation, Resource, ResourceAttributes, ResourceOperations, RootPath
+from .exceptions import ReloadServer, UnsupportedOperation
+from .helpers import Payload
+from .logger import log
+from .operations import ADD, READ_ATTRIBUTE, READ_RESOURCE, WRITE_ATTRIBUTE
+
+class AsyncJbossConnection(object):
+    def __init__(self, username: str, password: str, address: str = 'localhost', port: int = 9990, ssl: bool = False, ssl_verify: bool = True,
+                 max_in_flight: int = 100, connect_timeout: float = 10.0, read_timeout: float = 300.0, cache_dir: Optional[str] = None,
+                 read_cache_ttl: Optional[float] = None, read_cache_size: int = 1024, codec: Optional[Union[str, JsonCodec]] = None,
+                 compression: bool = True):
+        '''
+        Initiate asyncio connection to WildFly API. Nothing is sent until `connect()` is awaited, or connection
+        is used as async context manager:
+
+            >>> from pyjboss_api.aio import AsyncJbossConnection
+            >>> async with AsyncJbossConnection('management', 'secret') as jboss:
+            ...     suffix = await jboss.root.subsystem.logging.periodic_rotating_file_handler.FILE.attributes['suffix']
+
+        :param username (required): Username with admin privileges
+        :param password (required): Password of user you're connecting with
+        :param address (optional, default: 'localhost'): IP Address or hostname of WIldFly server
+        :param port (optional, default: 9990): Port where WildFly API is listening to
+        :param ssl (optional, False): If WildFly API is listening on SSL protocol, use it
+        :param ssl_verify (optional, True): If ssl is set to True, then this parameter determins if we need to verify ssl certificate or not.
+        :param max_in_flight (optional, 100): Maximum number of calls (and connections) in flight at the same time
+        :param connect_timeout (optional, 10.0): Seconds to wait for connection to be established
+        :param read_timeout (optional, 300.0): Seconds to wait for WildFly API to reply to a call
+        :param cache_dir (optional, None): Directory to cache resource descriptions in, see JbossConnection
+        :param read_cache_ttl (optional, None): If set, results of read operations are cached in memory for this many seconds
+        :param read_cache_size (optional, 1024): Maximum number of results kept in read cache
+        :param codec (optional, None): JSON codec, see JbossConnection
+        :param compression (optional, True): Ask for compressed responses (Accept-Encoding)
+        '''
+        if httpx is None:
+            raise ImportError("AsyncJbossConnection requires 'httpx' module. Install it with: pip install pyjboss_api[async]")
+
+        # Make sure parameters are of valid type
+        assert isinstance(address, str)
+        assert isinstance(username, str)
+        assert isinstance(password, str)
+        assert isinstance(port, int)
+        assert isinstance(ssl, bool)
+        assert isinstance(ssl_verify, bool)
+        assert isinstance(max_in_flight, int) and max_in_flight > 0
+        assert isinstance(compression, bool)
+
+        # Connection parameters
+        self.address = "%s://%s:%s/management" % ("https" if ssl else "http", address, port)
+        self.username = username
+        self.password = password
+        self.ssl_verify = ssl_verify
+        self.max_in_flight = max_in_flight
+        self.codec = get_codec(codec)
+        self.compression = compression
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.session = None
+        self._semaphore = None
+
+        # Variables holding previous call result
+        self.last_payload = None
+        self.last_call = None
+        self._reload_required = False
+
+        # Batches are not supported on async connection, operations are always sent immediately
+        self._batch = None
+
+        # Nodes already resolved by their path - see get()
+        self._index = PathIndex()
+
+        # Functions called before and after every call - see add_call_hook()
+        self.pre_call_hooks = []
+        self.post_call_hooks = []
+
+        self.description_cache = DescriptionCache(cache_dir, self.codec) if cache_dir else None
+        self._description_cache_key = None
+        self.read_cache = ReadCache(read_cache_ttl, read_cache_size) if read_cache_ttl else None
+
+        self._resource_description = None
+        self._initial_values = None
+        self._stale = set()
+        self.launch_type = None
+        self._read_args = {}
+        self.root = None
+
+    async def connect(self):
+        '''
+        Open connection pool, load resource descriptions and initial values and build model.
+        '''
+        if self.session is None:
+            self.session = httpx.AsyncClient(
+                auth=httpx.DigestAuth(self.username, self.password),
+                verify=self.ssl_verify,
+                timeout=self.timeout,
+                headers={'content-type': 'application/json'} if self.compression else {'content-type': 'application/json', 'accept-encoding': 'identity'},
+                limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        log.debug(f"Making first call to jboss controller at: {self.address}")
+        init_call = await AsyncCall(self, READ_ATTRIBUTE("launch-type"))
+        if init_call.exception:
+            raise ConnectionError("Failed to start establish initial connection to WildFly API. Raised exception: %s. Call result: %s" % (init_call.exception, init_call))
+
+        # Domain controller leaves out hosts and running servers it proxies from recursive reads, unless asked for them
+        self.launch_type = init_call.result if init_call.success else None
+        self._read_args = {"proxies": True} if self.launch_type == "DOMAIN" else {}
+
+        self._resource_description = await self._load_description()
+
+        log.debug("Extracting initial values for resources...")
+        self._initial_values = (await AsyncCall(self, Payload([], READ_RESOURCE, recursive=True, **self._read_args))).result
+
+        log.debug("Building a model.")
+        self.root = AsyncRootPath(self, self._resource_description)
+        return self
+
+    async def _load_description(self):
+        '''
+        Return recursive resource description, from cache if possible.
+        '''
+        if self.description_cache:
+            root = (await AsyncCall(self, Payload([], READ_RESOURCE))).return_result_or_raise()
+            self._description_cache_key = self.description_cache.key(root, self._read_args)
+            description = self.description_cache.load(self._description_cache_key)
+            if description is not None:
+                return description
+
+        log.debug("Extracting resource descriptions...")
+        description = await AsyncCall(self, Payload(operation='read-resource-description', recursive=True, operations=True, **self._read_args))
+        description.raise_for_status()
+        if self.description_cache:
+            self.description_cache.store(self._description_cache_key, description.result)
+        return description.result
+
+    def invalidate_description_cache(self):
+        '''
+        Remove cached resource description for this server build, next connection will download it again.
+        '''
+        if self.description_cache and self._description_cache_key:
+            self.description_cache.invalidate(self._description_cache_key)
+
+    async def call(self, payload: Union[dict, list, Payload]):
+        '''
+        Send payload and return completed AsyncCall.
+        '''
+        return await AsyncCall(self, payload)
+
+    add_call_hook = JbossConnection.add_call_hook
+    remove_call_hook = JbossConnection.remove_call_hook
+
+    def get(self, path, default = None):
+        '''
+        Return model node under given management path, or default if there's no such node. Same as
+        JbossConnection.get() - navigating the model doesn't make any calls, so this is not a coroutine.
+        '''
+        if self.root is None:
+            raise UnsupportedOperation("get (model was not loaded, await connect() first)")
+        try:
+            return self._index.resolve(self.root, path)
+        except KeyError:
+            return default
+
+    async def refresh(self, path = None) -> dict:
+        '''
+        Pick up resources added or removed outside of this connection. Same as JbossConnection.refresh(), except
+        that values read on connect are kept, since models can't load their children from server synchronously.
+        '''
+        if self.root is None:
+            raise UnsupportedOperation("refresh (model was not loaded, await connect() first)")
+        node = self.root if path is None else self._index.resolve(self.root, path)
+
+        changes = {}
+        for models in _loaded_models(node):
+            models = [ model for model in models if not _is_detached(model, changes) ]
+            if not models:
+                continue
+            res = await AsyncCall(self, Payload(operation="composite", steps=[ model._refresh_payload().to_dict() for model in models ]))
+            changes.update(_apply_refresh(models, res))
+        return changes
+
+    async def close(self):
+        '''
+        Close all pooled connections to WildFly API
+        '''
+        if self.session is not None:
+            await self.session.aclose()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def reload(self):
+        log.debug("Asked to reload.")
+        (await AsyncCall(self, Payload(operation="reload"))).raise_for_status()
+        self._reload_required = False
+
+    async def check_reload_required(self) -> bool:
+        '''
+        Ask WildFly API if server needs to be reloaded.
+        '''
+        res = await AsyncCall(self, READ_ATTRIBUTE("server-state"))
+        return res.reload_required
+
+    @property
+    def reload_required(self):
+        '''
+        Last known reload-required state, as reported by previous calls. Use `await check_reload_required()` to ask the server.
+        '''
+        return self._reload_required
+
+    @reload_required.setter
+    def reload_required(self, value: bool):
+        self._reload_required = value
+        if value == True:
+            warn("Server reload required", ReloadServer)
+
+class AsyncCall(Call):
+    _connection_errors = (httpx.TransportError,) if httpx else ()
+
+    def __init__(self, client: AsyncJbossConnection, payload: Union[dict, list, Payload]):
+        '''
+        Awaitable counterpart of Call - payload is sent when instance is awaited, and awaiting returns the instance itself.
+
+            >>> res = await AsyncCall(jboss, Payload("/subsystem=logging", "read-resource"))
+            >>> res.result
+        '''
+        self.client = client
+        self._payload = self._payload_dict(payload)
+        self.payload = client.codec.dumps(self._payload)
+        self.reload_required = False
+        self.rolled_back = False
+        self.exception = None
+        self.cached = False
+        self.request = None
+        self.success = None
+        self.result = None
+
+    def __await__(self):
+        return self._send().__await__()
+
+    async def _send(self):
+        client = self.client
+        client.last_payload = self.payload
+        client.last_call = self
+
+        debug = log.isEnabledFor(DEBUG)
+        event = self._started()
+        if self._from_cache(event, debug):
+            return self
+
+        res = response = None
+        posted = parsed = None
+        try:
+            async with client._semaphore:
+                if debug:
+                    log.debug(f"Running call with payload: {self.payload}")
+                res = await client.session.post(client.address, content=self.payload.encode())
+            posted = perf_counter()
+            self.request = res
+            if debug:
+                log.debug(f"Call completed with status code: {res.status_code}")
+            response = client.codec.loads(res.content)
+            parsed = perf_counter()
+        except Exception as e:
+            self._failed(e, res)
+        else:
+            self._load_response(response)
+        self._finished(event, response, posted, parsed)
+        return self
+
+    def __repr__(self):
+        return "JbossResult(success=%s,result=%s,reload_required=%s)" % (self.success, self.result, self.reload_required)
+
+class AsyncRootPath(RootPath):
+    __slots__ = ()
+
+class AsyncResourceAttributes(ResourceAttributes):
+    '''
+    Attributes of resource on async connection. Reading with `attributes['name']` returns awaitable, while
+    writing has to be done with `await attributes.set('name', value)` since item assignment cannot be awaited.
+    '''
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    async def get(self, key):
+        return (await AsyncCall(self._connection, Payload(self._address, **READ_ATTRIBUTE(key)))).return_result_or_raise()
+
+    def __setitem__(self, key, value):
+        raise UnsupportedOperation("item assignment (use 'await attributes.set(name, value)')")
+
+    async def set(self, key, value):
+        if self._attributes[key]['type']['TYPE_MODEL_VALUE'] in ATTR_TYPES:
+            _type = ATTR_TYPES[self._attributes[key]['type']['TYPE_MODEL_VALUE']]
+            if not isinstance(value, _type):
+                raise ValueError(f"Value passed must be type of {_type}, not {type(value)}")
+        (await AsyncCall(self._connection, Payload(self._address, **WRITE_ATTRIBUTE(key, value)))).raise_for_status()
+
+    async def read_all(self, include_runtime: bool = True, include_defaults: bool = True) -> dict:
+        res = await AsyncCall(self._connection, Payload(self._address, READ_RESOURCE, **{"include-runtime": include_runtime, "include-defaults": include_defaults}))
+        res.raise_for_status()
+        return { k: res.result[k] for k in self._keys if k in res.result }
+
+    async def read(self, names: list, include_runtime: bool = True, include_defaults: bool = True) -> dict:
+        for name in names:
+            if name not in self._attributes:
+                raise KeyError(name)
+        values = await self.read_all(include_runtime, include_defaults)
+        return { name: values.get(name) for name in names }
+
+    async def values(self):
+        return (await self.read_all()).values()
+
+    async def items(self):
+        return (await self.read_all()).items()
+
+    def __repr__(self):
+        return "AsyncResourceAttributes(%s)" % list(self._keys)
+
+class AsyncOperation(Operation):
+    __slots__ = ()
+
+    async def __call__(self, **kwargs):
+        if log.isEnabledFor(DEBUG):
+            log.debug(f"Running operation '{self._name} with kwargs: {kwargs}")
+        res = await AsyncCall(self._connection, Payload(self._address, self._name, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs }))
+        if self._name == 'remove' and res.success:
+            self._removed()
+        return res
+
+class AsyncResourceOperations(ResourceOperations):
+    __slots__ = ()
+    _operation_class = AsyncOperation
+
+class AsyncModel(Model):
+    __slots__ = ()
+
+    def _load_names(self):
+        # Models created after connect (below resources added with add()) can't call WildFly API synchronously,
+        # so they only know about children added through this connection.
+        if not self._initial_run:
+            return [ subdir for subdir in self._child['model-description'] if subdir != '*' ]
+        return super()._load_names()
+
+    async def refresh(self) -> tuple:
+        if not self._expandable:
+            raise UnsupportedOperation("refresh")
+        res = await AsyncCall(self._connection, Payload(operation="composite", steps=[self._refresh_payload().to_dict()]))
+        return _apply_refresh([self], res).get(self._address, ([], []))
+
+    async def add(self, name: str, **kwargs):
+        if not self._expandable:
+            raise UnsupportedOperation("add")
+        payload = Payload(f"{self._address}={quote_plus(name)}", ADD, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs })
+        res = await AsyncCall(self._connection, payload)
+        if res.success:
+            self._added(name)
+        return res
+
+class AsyncResource(Resource):
+    __slots__ = ()
+    _model_class = AsyncModel
+    _attributes_class = AsyncResourceAttributes
+    _operations_class = AsyncResourceOperations
+
+AsyncRootPath._model_class = AsyncModel
+AsyncModel._resource_class = AsyncResource
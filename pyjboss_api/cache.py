@@ -0,0 +1,231 @@
+import os
+from collections import OrderedDict
+from hashlib import sha1
+from json import dumps as jdumps
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+from .codec import JsonCodec, get_codec
+from .helpers import Addresses
+from .logger import log
+
+# Root attributes which identify server build - if any of these change, cached description is not reused
+SERVER_INFO_ATTRIBUTES = (
+    "product-name",
+    "product-version",
+    "release-version",
+    "management-major-version",
+    "management-minor-version",
+    "management-micro-version",
+)
+
+# Operations whose results can be served from ReadCache
+CACHEABLE_OPERATIONS = (
+    "read-attribute",
+    "read-resource",
+    "read-children-names",
+    "read-children-resources",
+    "read-children-types",
+)
+
+# Operations that flush ReadCache entirely
+FLUSH_OPERATIONS = ("reload", "shutdown")
+
+def is_read_operation(operation: str) -> bool:
+    return bool(operation) and (operation.startswith("read-") or operation in ("whoami", "query", "resolve-expression"))
+
+class DescriptionCache(object):
+    def __init__(self, directory: str, codec: Optional[JsonCodec] = None):
+        '''
+        On-disk cache of resource descriptions. Entries are keyed by server build (product name/version,
+        management API version and loaded extensions) and stored as JSON files, which are much faster to
+        load than re-downloading description from WildFly API. Entries are plain data, so tampered entry can't
+        run code, but it can still change the model - use directory only you can write to.
+
+        :param directory (required): Directory where cache entries are stored, created (accessible only by owner) if missing
+        :param codec (optional): JsonCodec used to encode and decode entries, standard json if not set
+        '''
+        assert isinstance(directory, str)
+        self.directory = directory
+        self.codec = get_codec(codec)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    @staticmethod
+    def key(root: dict, extra: Optional[dict] = None) -> str:
+        '''
+        Build cache key from result of non-recursive read-resource on root path.
+
+        :param root (required): Result of read-resource on root path
+        :param extra (optional): Additional values that should be part of the key
+        '''
+        info = { attr: root.get(attr) for attr in SERVER_INFO_ATTRIBUTES }
+        info["extensions"] = sorted(root.get("extension") or [])
+        if extra:
+            info.update(extra)
+        return sha1(jdumps(info, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        '''
+        Return cached description for given key or None if there is no (readable) entry.
+        '''
+        try:
+            with open(self._path(key), "rb") as fh:
+                description = self.codec.loads(fh.read())
+        except FileNotFoundError:
+            log.debug(f"No cached description for key {key}")
+            return None
+        except Exception as e:
+            log.debug(f"Failed to load cached description for key {key}: {e}")
+            self.invalidate(key)
+            return None
+        if not isinstance(description, dict):
+            log.debug(f"Cached description for key {key} is not valid")
+            self.invalidate(key)
+            return None
+        log.debug(f"Loaded cached description for key {key}")
+        return description
+
+    def store(self, key: str, description: dict):
+        '''
+        Store description under given key. File is written atomically so concurrent processes never read partial entry.
+        '''
+        with NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False) as fh:
+            fh.write(self.codec.dumps(description))
+        os.replace(fh.name, self._path(key))
+        log.debug(f"Stored description under key {key}")
+
+    def invalidate(self, key: Optional[str] = None):
+        '''
+        Remove cache entry for given key, or all entries if key is not passed.
+        '''
+        keys = [key] if key else [ f[:-len(".json")] for f in os.listdir(self.directory) if f.endswith(".json") ]
+        for _key in keys:
+            try:
+                os.remove(self._path(_key))
+            except FileNotFoundError:
+                pass
+
+    def __repr__(self):
+        return f"DescriptionCache({self.directory})"
+
+class ReadCache(object):
+    def __init__(self, ttl: float, size: int = 1024):
+        '''
+        In-memory LRU cache of read-only operation results, sitting in front of `Call`. Entries expire
+        after `ttl` seconds. Any other operation invalidates entries whose address is prefix of, or is
+        prefixed by, address of that operation, and reload/shutdown flushes the cache entirely.
+
+        :param ttl (required): Seconds after which cached result expires
+        :param size (optional, 1024): Maximum number of cached results, least recently used are evicted first
+        '''
+        assert isinstance(ttl, (int, float)) and ttl > 0
+        assert isinstance(size, int) and size > 0
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(payload: dict) -> Optional[str]:
+        if not isinstance(payload, dict) or payload.get("operation") not in CACHEABLE_OPERATIONS:
+            return None
+        return jdumps(payload, sort_keys=True)
+
+    def get(self, payload: dict) -> Optional[dict]:
+        '''
+        Return cached response for payload, or None if payload is not cacheable or there's no valid entry.
+        '''
+        key = self._key(payload)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def update(self, payload: dict, response: dict):
+        '''
+        Feed payload and its response to the cache - successful reads are stored, anything else invalidates
+        affected entries.
+        '''
+        if not isinstance(payload, dict):
+            return
+        operation = payload.get("operation")
+        if operation == "composite":
+            for step in payload.get("steps", []):
+                self.update(step, None)
+            return
+        if operation in FLUSH_OPERATIONS:
+            self.clear()
+            return
+        if not is_read_operation(operation):
+            self.invalidate(payload.get("address"))
+            return
+
+        key = self._key(payload)
+        if key is None or not response or response.get("outcome") != "success":
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, Addresses.key(payload.get("address")), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, address = None):
+        '''
+        Drop entries under (or above) given address. Without address, everything is dropped.
+
+        :param address (optional): Address as list of dicts (like in payload) or instance of Addresses
+        '''
+        prefix = Addresses.key(address)
+        if not prefix:
+            return self.clear()
+        with self._lock:
+            for key in [ k for k, (_, addr, _) in self._entries.items() if addr[:len(prefix)] == prefix or prefix[:len(addr)] == addr ]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        '''
+        Drop all cached entries.
+        '''
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        '''
+        Return hit/miss statistics of this cache.
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "ReadCache(ttl=%s,size=%s,entries=%s)" % (self.ttl, self.size, len(self._entries))
@@ -0,0 +1,147 @@
+'''
+Diffing of desired configuration against current state of the server, used by `JbossConnection.apply()`.
+
+Desired state is dict with addresses as keys. Value of each address is dict of attributes and child resources
+(grouped by child type, same shape as result of recursive `read-resource`), or None if resource should be removed:
+
+    {
+        "/subsystem=logging": {
+            "logger": {
+                "com.example": {"level": "DEBUG"},
+                "com.legacy": None,
+            },
+        },
+        "/subsystem=datasources/data-source=ExampleDS": {"min-pool-size": 5},
+    }
+
+Attributes and resources that are not mentioned are left as they are.
+'''
+from typing import Optional
+
+from .exceptions import FailedApiCall
+from .helpers import Addresses, Payload, scalar
+from .operations import ADD, WRITE_ATTRIBUTE
+
+def _same(current, desired) -> bool:
+    '''
+    Compare values the way server does - 5 and "5", or True and "true" are the same value.
+    '''
+    if current == desired:
+        return True
+    if isinstance(current, (dict, list)) or isinstance(desired, (dict, list)) or current is None or desired is None:
+        return False
+    return scalar(current) == scalar(desired)
+
+def _name(key: str, names: dict) -> str:
+    # Python-friendly names (min_pool_size) are accepted too
+    if key in names:
+        return key
+    if key.replace("_", "-") in names:
+        return key.replace("_", "-")
+    return None
+
+class Changeset(object):
+    def __init__(self):
+        '''
+        Changes needed to bring server to desired state - steps of composite operation that is sent to the server,
+        and list of changes in readable form. Returned by `JbossConnection.apply()`; if changes were sent, `call`
+        holds the Call and `success`, `result` and `reload_required` are taken from it.
+        '''
+        # Tuples of (action, key, attribute name, old value, new value)
+        self.changes = []
+        self.steps = []
+        self.call = None
+
+    def add(self, key: tuple, attributes: dict):
+        self.changes.append((ADD, key, None, None, attributes))
+        self.steps.append(Payload(Addresses(*key), ADD, **attributes).to_dict())
+
+    def write(self, key: tuple, name: str, old, new):
+        self.changes.append(("write-attribute", key, name, old, new))
+        self.steps.append(Payload(Addresses(*key), **WRITE_ATTRIBUTE(name, new)).to_dict())
+
+    def remove(self, key: tuple):
+        self.changes.append(("remove", key, None, None, None))
+        self.steps.append(Payload(Addresses(*key), "remove").to_dict())
+
+    def diff(self, key: tuple, desired: Optional[dict], current: Optional[dict], description: dict):
+        '''
+        Add changes turning `current` values of resource under key into `desired` ones. None means resource doesn't
+        exist (current) or should be removed (desired).
+        '''
+        if desired is None:
+            if current is not None:
+                self.remove(key)
+            return
+        assert isinstance(desired, dict), f"Desired state of {Addresses.format(key)} must be dict or None"
+
+        attributes, children = {}, {}
+        for name, value in desired.items():
+            if _name(name, description['children']):
+                children[_name(name, description['children'])] = value
+            elif _name(name, description['attributes']):
+                attributes[_name(name, description['attributes'])] = value
+            else:
+                raise KeyError(f"{Addresses.format(key)} has no attribute or child type named '{name}'")
+
+        if current is None:
+            self.add(key, { name: value for name, value in attributes.items() if value is not None })
+        else:
+            for name, value in attributes.items():
+                if not _same(current.get(name), value):
+                    self.write(key, name, current.get(name), value)
+
+        for child_type, resources in children.items():
+            assert isinstance(resources, dict), f"Resources of {Addresses.format(key + (child_type,))} must be given as dict"
+            models = description['children'][child_type]['model-description'] or {}
+            existing = ((current or {}).get(child_type) or {})
+            for name, value in resources.items():
+                child = models.get(name) or models.get('*')
+                if child is None:
+                    raise KeyError(f"{Addresses.format(key + (child_type, name))} is not a valid resource")
+                self.diff(key + (child_type, name), value, existing.get(name), child)
+
+    @property
+    def success(self) -> bool:
+        return self.call.success if self.call is not None else True
+
+    @property
+    def result(self):
+        return self.call.result if self.call is not None else None
+
+    @property
+    def reload_required(self) -> bool:
+        return self.call.reload_required if self.call is not None else False
+
+    def raise_for_status(self):
+        if self.call is not None and not self.call.success:
+            raise FailedApiCall(self.call)
+
+    def plan(self) -> str:
+        '''
+        Return changes in readable form, one per line:
+            + /subsystem=logging/logger=com.example {'level': 'DEBUG'}
+            ~ /subsystem=datasources/data-source=ExampleDS min-pool-size: 0 -> 5
+            - /subsystem=logging/logger=com.legacy
+        '''
+        lines = []
+        for action, key, name, old, new in self.changes:
+            if action == ADD:
+                lines.append(f"+ {Addresses.format(key)} {new}")
+            elif action == "remove":
+                lines.append(f"- {Addresses.format(key)}")
+            else:
+                lines.append(f"~ {Addresses.format(key)} {name}: {old!r} -> {new!r}")
+        return "\n".join(lines)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __str__(self):
+        return self.plan()
+
+    def __repr__(self):
+        return "Changeset(changes=%s,sent=%s,success=%s,reload_required=%s)" % (len(self.changes), self.call is not None, self.success, self.reload_required)
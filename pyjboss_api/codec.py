@@ -0,0 +1,92 @@
+'''
+JSON codecs used to encode payloads and decode responses of WildFly API.
+
+Recursive reads and resource descriptions can be many megabytes of JSON, so faster JSON library (`orjson` or `ujson`)
+can be used instead of standard `json` module, which is the default. Documents that fast library refuses are decoded
+and encoded with standard `json` module instead. Fast codecs are used only when asked for by name, since orjson
+silently decodes integers that don't fit 64 bits (BIG_INTEGER attributes) as float.
+
+Payloads are encoded to ASCII-only JSON text, which is turned into bytes when it's sent - `str` body with non-ASCII
+characters would be encoded as Latin-1 by older urllib3.
+'''
+import json
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+from .logger import log
+
+class JsonCodec(object):
+    name = "json"
+    # Exceptions raised when response is not valid JSON
+    errors = (json.JSONDecodeError,)
+
+    def dumps(self, obj) -> str:
+        return json.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]):
+        return json.loads(data)
+
+    def __repr__(self):
+        return "JsonCodec(%s)" % self.name
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+    errors = (json.JSONDecodeError, orjson.JSONDecodeError) if orjson else JsonCodec.errors
+
+    def dumps(self, obj) -> str:
+        try:
+            # orjson can't escape non-ASCII characters, leave such payloads to standard json
+            return orjson.dumps(obj).decode("ascii")
+        except (TypeError, UnicodeDecodeError):
+            return json.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+    # Older ujson versions raise plain ValueError
+    errors = (json.JSONDecodeError, getattr(ujson, "JSONDecodeError", ValueError)) if ujson else JsonCodec.errors
+
+    def dumps(self, obj) -> str:
+        try:
+            return ujson.dumps(obj, ensure_ascii=True)
+        except (TypeError, OverflowError):
+            return json.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]):
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            return json.loads(data)
+
+# Installed codecs, fastest first
+CODECS = { codec.name: codec for codec, module in ((OrjsonCodec, orjson), (UjsonCodec, ujson), (JsonCodec, json)) if module is not None }
+
+def get_codec(codec: Optional[Union[str, JsonCodec]] = None) -> JsonCodec:
+    '''
+    Return codec instance. If name isn't given, standard `json` is used; if codec with given name isn't installed,
+    standard `json` is used instead as well.
+
+    :param codec (optional): Name of codec ('orjson', 'ujson', 'json') or instance of JsonCodec
+    '''
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is None:
+        return JsonCodec()
+    if codec not in CODECS:
+        log.debug(f"JSON codec '{codec}' is not installed, using 'json' instead")
+        return JsonCodec()
+    return CODECS[codec]()
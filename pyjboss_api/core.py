@@ -1,18 +1,26 @@
-import pdb
-from json import dumps as jdumps
-from typing import Union
-from urllib.parse import quote_plus
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from logging import DEBUG
+from time import perf_counter
+from typing import Optional, Union
+from urllib.parse import quote_plus, unquote_plus
 from warnings import warn
 
-from jmespath import search as jpsearch
-from requests import post
+from requests import Session
 from requests.auth import HTTPDigestAuth
-from requests.exceptions import ConnectionError, JSONDecodeError
+from requests.exceptions import ConnectionError
 
+from .cache import FLUSH_OPERATIONS, DescriptionCache, ReadCache, is_read_operation
+from .changeset import Changeset
+from .codec import JsonCodec, get_codec
 from .exceptions import CallRaisedException, FailedApiCall, ReloadServer, UnsupportedOperation
 from .helpers import Addresses, Payload, pyattr
+from .instrumentation import CallEvent, TimingAdapter, run_hooks
+from .upload import MultipartBody
 from .logger import log
-from .operations import ADD, READ_ATTRIBUTE, READ_RESOURCE, WRITE_ATTRIBUTE
+from .operations import ADD, READ_ATTRIBUTE, READ_CHILDREN_NAMES, READ_RESOURCE, WRITE_ATTRIBUTE
+from .query import QueryIndex, QueryResult, evaluate, expand
 
 ATTR_TYPES = {
     "BOOLEAN": bool,
@@ -20,7 +28,10 @@ ATTR_TYPES = {
 }
 
 class JbossConnection(object):
-    def __init__(self, username: str, password: str, address: str = 'localhost', port: int = 9990, ssl: bool = False, ssl_verify: bool = True):
+    def __init__(self, username: str, password: str, address: str = 'localhost', port: int = 9990, ssl: bool = False, ssl_verify: bool = True,
+                 pool_size: int = 10, connect_timeout: float = 10.0, read_timeout: float = 300.0, cache_dir: Optional[str] = None,
+                 read_cache_ttl: Optional[float] = None, read_cache_size: int = 1024, load_model: bool = True, scope: Optional[list] = None,
+                 codec: Optional[Union[str, JsonCodec]] = None, compression: bool = True):
         '''
         Initiate connection to WildFly API
 
@@ -37,6 +48,21 @@ class JbossConnection(object):
         :param port (optional, default: 9990): Port where WildFly API is listening to
         :param ssl (optional, False): If WildFly API is listening on SSL protocol, use it
         :param ssl_verify (optional, True): If jboss_ssl is set to True, then this parameter determins if we need to verify ssl certificate or not.
+        :param pool_size (optional, 10): Maximum number of keep-alive connections held open to WildFly API
+        :param connect_timeout (optional, 10.0): Seconds to wait for connection to be established
+        :param read_timeout (optional, 300.0): Seconds to wait for WildFly API to reply to a call
+        :param cache_dir (optional, None): Directory to cache resource descriptions in. When set, description is downloaded
+            only once per server build (product version, management API version and loaded extensions) and reused afterwards.
+        :param read_cache_ttl (optional, None): If set, results of read operations are cached in memory for this many seconds.
+            Writes invalidate cached results under affected address and reload flushes the cache.
+        :param read_cache_size (optional, 1024): Maximum number of results kept in read cache
+        :param load_model (optional, True): If False, resource descriptions and initial values are not loaded and `root` is None.
+            Useful when you only need to run calls with `Call` and want connection to be established quickly.
+        :param scope (optional, None): List of addresses (like '/subsystem=datasources' or '/deployment') to load model for.
+            Descriptions and values are loaded only for these branches, in parallel, and `root` holds only them.
+        :param codec (optional, None): JSON codec - 'orjson', 'ujson', 'json' or instance of JsonCodec. Standard json is used if not set,
+            fast codecs decode integers that don't fit 64 bits as float.
+        :param compression (optional, True): Ask for compressed responses (Accept-Encoding). Turn off on fast networks to save CPU.
         '''
 
         # Make sure parameters are of valid type
@@ -46,35 +72,528 @@ class JbossConnection(object):
         assert isinstance(port, int)
         assert isinstance(ssl, bool)
         assert isinstance(ssl_verify, bool)
+        assert isinstance(pool_size, int) and pool_size > 0
+        assert cache_dir is None or isinstance(cache_dir, str)
+        assert isinstance(load_model, bool)
+        assert scope is None or (isinstance(scope, (list, tuple)) and all(scope))
+        assert isinstance(compression, bool)
 
         # Connection parameters
         self.address = "%s://%s:%s/management" % ("https" if ssl else "http", address, port)
         self.username = username
         self.password = password
         self.ssl_verify = ssl_verify
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.scope = list(scope) if scope else None
+        self.codec = get_codec(codec)
+
+        # Persistent session - connections are kept alive and pooled, and since digest authentication
+        # object is shared between calls, nonce and nonce-count from previous challenge are reused so
+        # we don't pay for 401 round-trip on every call. Digest state is kept per thread by requests, so
+        # first call made from each thread is still challenged.
+        self.session = Session()
+        self.session.auth = HTTPDigestAuth(username=username, password=password)
+        self.session.verify = ssl_verify
+        self.session.headers.update({'content-type': 'application/json'})
+        # Same as requests' default, compressed responses are decompressed as they are downloaded
+        self.session.headers['accept-encoding'] = 'gzip, deflate' if compression else 'identity'
+        # Adapter records connect and server times of every response for call hooks
+        adapter = TimingAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
         # Variables holding previous call result
         self.last_payload = None
         self.last_call = None
 
+        # Active batch, if any - see batch()
+        self._batch = None
+
+        # Nodes already resolved by their path - see get()
+        self._index = PathIndex()
+
+        # Resources matched by query patterns and indexes of their attributes - see query()
+        self._query_index = QueryIndex()
+
+        # Values read on connect, and addresses written since - values under them are not trusted anymore
+        self._initial_values = None
+        self._stale = set()
+
+        # Functions called before and after every call - see add_call_hook()
+        self.pre_call_hooks = []
+        self.post_call_hooks = []
+
+        # Optional on-disk cache of resource descriptions
+        self.description_cache = DescriptionCache(cache_dir, self.codec) if cache_dir else None
+        self._description_cache_key = None
+
+        # Optional in-memory cache of read operation results
+        self.read_cache = ReadCache(read_cache_ttl, read_cache_size) if read_cache_ttl else None
+
+        try:
+            self._connect(load_model)
+        except BaseException:
+            # Don't leave pooled connections open when connection can't be established
+            self.session.close()
+            raise
+
+    def _connect(self, load_model: bool):
+        '''
+        Make first call to WildFly API and, if requested, load descriptions and initial values and build model.
+        '''
         # Make first call
         log.debug(f"Making first call to jboss controller at: {self.address}")
-        init_call = Call(self, READ_ATTRIBUTE("server-state"))
+        init_call = Call(self, READ_ATTRIBUTE("launch-type"))
         if init_call.exception:
             raise ConnectionError("Failed to start establish initial connection to WildFly API. Raised exception: %s. Call result: %s" % (init_call.exception, init_call))
 
-        # Load resource descriptions so we can build models on top of them
-        log.debug("Extracting resource descriptions...")
-        self._resource_description = Call(self, Payload(operation='read-resource-description', recursive=True, operations=True))
-        self._resource_description.raise_for_status()
+        # Domain controller leaves out hosts and running servers it proxies from recursive reads, unless asked for them
+        self.launch_type = init_call.result if init_call.success else None
+        self._read_args = {"proxies": True} if self.launch_type == "DOMAIN" else {}
+
+        self.root = None
+        if not load_model:
+            log.debug("Not loading model as requested.")
+            return
+
+        if self.scope:
+            # Load descriptions and values only for requested branches
+            self._resource_description, self._initial_values = self._load_scope()
+        else:
+            # Load resource descriptions so we can build models on top of them
+            self._resource_description = self._load_description()
 
-        # Load initial values - this will come in handy so we don't call read-resource for every applicable resource
-        log.debug("Extracting initial values for resources...")
-        self._initial_values = Call(self, Payload([], READ_RESOURCE, recursive=True)).result
+            # Load initial values - this will come in handy so we don't call read-resource for every applicable resource
+            log.debug("Extracting initial values for resources...")
+            self._initial_values = Call(self, Payload([], READ_RESOURCE, recursive=True, **self._read_args)).result
 
         # Start building model
         log.debug("Building a model.")
-        self.root = RootPath(self, self._resource_description.result)
+        self.root = RootPath(self, self._resource_description)
+
+    def _cached_description(self, extra: Optional[dict] = None) -> Optional[dict]:
+        '''
+        Return description from cache if it's cached for this server build, None otherwise.
+        '''
+        if not self.description_cache:
+            return None
+        # Cheap version check - non-recursive read of root gives us server build and names of loaded extensions
+        root = Call(self, Payload([], READ_RESOURCE)).return_result_or_raise()
+        self._description_cache_key = self.description_cache.key(root, dict(extra or {}, **self._read_args))
+        return self.description_cache.load(self._description_cache_key)
+
+    def _load_description(self):
+        '''
+        Return recursive resource description, from cache if possible.
+        '''
+        description = self._cached_description()
+        if description is not None:
+            return description
+
+        log.debug("Extracting resource descriptions...")
+        description = Call(self, Payload(operation='read-resource-description', recursive=True, operations=True, **self._read_args))
+        description.raise_for_status()
+        if self.description_cache:
+            self.description_cache.store(self._description_cache_key, description.result)
+        return description.result
+
+    def _load_scope(self) -> tuple:
+        '''
+        Load descriptions and values of branches listed in scope, in parallel, and merge them into description
+        and values shaped like those of root resource, but containing only scoped branches.
+        '''
+        prefixes = sorted({ PathIndex.key(prefix) for prefix in self.scope }, key=len)
+        # Branches nested in other branches are loaded with their parent anyway
+        prefixes = [ prefix for i, prefix in enumerate(prefixes) if not any( prefix[:len(other)] == other for other in prefixes[:i] ) ]
+
+        description = self._cached_description({"scope": [ "/".join(prefix) for prefix in prefixes ]})
+        log.debug(f"Extracting {'values' if description else 'resource descriptions and values'} for scope: {prefixes}")
+        tasks = [ (self._read_prefix, prefix) for prefix in prefixes ]
+        if description is None:
+            tasks.extend( (self._describe_prefix, prefix) for prefix in prefixes )
+        if len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.pool_size, len(tasks))) as executor:
+                results = list(executor.map(lambda task: task[0](task[1]), tasks))
+        else:
+            results = [ tasks[0][0](tasks[0][1]) ]
+        values, descriptions = results[:len(prefixes)], results[len(prefixes):]
+
+        if description is None:
+            description = {"description": None, "attributes": {}, "operations": {}, "children": {}}
+            for prefix, _description in zip(prefixes, descriptions):
+                _scope_merge(description, prefix, _description, resource = {"description": None, "attributes": {}, "operations": {}, "children": {}})
+            if self.description_cache:
+                self.description_cache.store(self._description_cache_key, description)
+
+        initial_values = {}
+        for prefix, _values in zip(prefixes, values):
+            _scope_merge(initial_values, prefix, _values, resource = {})
+        return description, initial_values
+
+    def _describe_prefix(self, prefix: tuple) -> dict:
+        '''
+        Return recursive description of resource (or, for model like ('deployment',), its wildcard resource) under prefix.
+        '''
+        address = Addresses(*prefix, "*") if len(prefix) % 2 else Addresses(*prefix)
+        result = Call(self, Payload(address, 'read-resource-description', recursive=True, operations=True, **self._read_args)).return_result_or_raise()
+        # Description of wildcard address is returned as list of results
+        if isinstance(result, list):
+            result = result[0]['result']
+        return result
+
+    def _read_prefix(self, prefix: tuple) -> dict:
+        '''
+        Return recursive values of resource (or, for model like ('deployment',), of all its resources) under prefix.
+        '''
+        if len(prefix) % 2:
+            payload = Payload(Addresses(*prefix[:-1]), 'read-children-resources', recursive=True, **{"child-type": prefix[-1]}, **self._read_args)
+        else:
+            payload = Payload(Addresses(*prefix), READ_RESOURCE, recursive=True, **self._read_args)
+        return Call(self, payload).return_result_or_raise() or {}
+
+    def invalidate_description_cache(self):
+        '''
+        Remove cached resource description for this server build, next connection will download it again.
+        '''
+        if self.description_cache and self._description_cache_key:
+            self.description_cache.invalidate(self._description_cache_key)
+
+    def add_call_hook(self, pre = None, post = None):
+        '''
+        Register functions called with `CallEvent` before every call is sent (pre) and after it's completed (post).
+        Event holds operation, address, request/response size, outcome and time spent connecting, authenticating,
+        waiting for server and parsing response.
+
+            >>> from pyjboss_api.instrumentation import CallMetrics
+            >>> metrics = CallMetrics()
+            >>> jboss.add_call_hook(post=metrics)
+            >>> jboss.add_call_hook(post=lambda event: event.total > 1 and print("Slow call:", event))
+
+        :param pre (optional): Function called before call is sent
+        :param post (optional): Function called after call is completed
+        '''
+        if pre is not None:
+            self.pre_call_hooks.append(pre)
+        if post is not None:
+            self.post_call_hooks.append(post)
+
+    def remove_call_hook(self, hook):
+        '''
+        Unregister function previously registered with add_call_hook().
+        '''
+        for hooks in (self.pre_call_hooks, self.post_call_hooks):
+            while hook in hooks:
+                hooks.remove(hook)
+
+    def get(self, path: Union[Addresses, str, list, tuple], default = None):
+        '''
+        Return model node (Model or Resource) under given management path, or default if there's no such node.
+        Resolved paths are indexed, so looking up same path again (or path under it) is a single dict lookup.
+
+            >>> jboss.get('/subsystem=datasources/data-source=ExampleDS').attributes['enabled']
+            >>> jboss.get('/subsystem=logging/logger')
+
+        :param path (required): Address as string ('/subsystem=logging'), instance of Addresses or list of path elements
+        :param default (optional, None): Value returned if path doesn't exist in model
+        '''
+        if self.root is None:
+            raise UnsupportedOperation("get (model was not loaded)")
+        try:
+            return self._index.resolve(self.root, path)
+        except KeyError:
+            return default
+
+    def refresh(self, path: Optional[Union[Addresses, str, list, tuple]] = None) -> dict:
+        '''
+        Pick up resources added or removed outside of this connection, without rebuilding the model. Children of
+        every expandable model that was already loaded (under given path) are compared with `read-children-names`,
+        sent as one composite call per level of the tree. New resources are created and removed ones are dropped,
+        existing resources (and everything loaded under them) are kept as they are.
+
+        Values read on connect are considered outdated afterwards, so models loaded later ask server for their children.
+
+            >>> jboss.refresh('/deployment')
+            {'/deployment': (['new.war'], ['old.war'])}
+
+        :param path (optional, None): Address of model or resource to refresh, whole model if not passed
+        :return: Dict with address of each changed model as key and tuple of (added, removed) names as value
+        '''
+        if self.root is None:
+            raise UnsupportedOperation("refresh (model was not loaded)")
+        node = self.root if path is None else self._index.resolve(self.root, path)
+        self._initial_values = None
+        self._stale.clear()
+        self._query_index.clear()
+
+        changes = {}
+        for models in _loaded_models(node):
+            models = [ model for model in models if not _is_detached(model, changes) ]
+            if not models:
+                continue
+            res = Call(self, Payload(operation="composite", steps=[ model._refresh_payload().to_dict() for model in models ]))
+            changes.update(_apply_refresh(models, res))
+        return changes
+
+    def apply(self, desired: dict, dry_run: bool = False, fresh: bool = True) -> Changeset:
+        '''
+        Bring server to desired state. Desired state is dict with addresses as keys and dicts of attributes and
+        child resources (or None to remove resource) as values. Current state of all listed addresses is read with
+        one composite call, and only differences are sent - as add, write-attribute and remove steps of single
+        composite operation, so they are applied (or rolled back) together. Nothing is sent if there are no differences.
+
+            >>> changes = jboss.apply({
+            ...     "/subsystem=logging": {"logger": {"com.example": {"level": "DEBUG"}, "com.legacy": None}},
+            ...     "/subsystem=datasources/data-source=ExampleDS": {"min-pool-size": 5},
+            ... })
+            >>> print(changes.plan())
+            >>> changes.reload_required
+
+        :param desired (required): Dict of {address: attributes and children}, see pyjboss_api.changeset
+        :param dry_run (optional, False): Only compute changes, don't send them
+        :param fresh (optional, True): Read current state from server. If False, values read on connect are used
+            when they cover the address and nothing was written under it since, so unchanged configuration costs no call at all.
+        :return: Instance of Changeset
+        '''
+        assert isinstance(desired, dict)
+        targets = {}
+        for address, value in desired.items():
+            key = PathIndex.key(address)
+            # Address of model (like '/deployment') holds its resources by name
+            if len(key) % 2:
+                key, value = key[:-1], {key[-1]: value}
+            if isinstance(targets.get(key), dict) and isinstance(value, dict):
+                targets[key].update(value)
+            else:
+                targets[key] = value
+
+        currents, descriptions, steps = {}, {}, []
+        for key in targets:
+            found, current = (False, None) if fresh else self._snapshot_value(key)
+            if found:
+                currents[key] = current
+            else:
+                steps.append(("values", key, Payload(Addresses(*key), READ_RESOURCE, recursive=True, **self._read_args)))
+            description = self._description_of(key)
+            if description is not None:
+                descriptions[key] = description
+            else:
+                steps.append(("description", key, Payload(Addresses(*key), 'read-resource-description', recursive=True, **self._read_args)))
+
+        if steps:
+            res = Call(self, Payload(operation="composite", steps=[ payload.to_dict() for _, _, payload in steps ]))
+            results = res.result if isinstance(res.result, dict) else {}
+            for i, (kind, key, _) in enumerate(steps, 1):
+                step = results.get(f"step-{i}") or {}
+                if "result" in step and "failure-description" not in step:
+                    (currents if kind == "values" else descriptions)[key] = step["result"]
+                elif kind == "values" and "WFLYCTL0216" in str(step.get("failure-description")):
+                    # Resource doesn't exist
+                    currents[key] = None
+                else:
+                    raise FailedApiCall(res)
+
+        changeset = Changeset()
+        for key, value in targets.items():
+            changeset.diff(key, value, currents[key], descriptions[key])
+        if dry_run or not changeset.steps:
+            return changeset
+
+        log.debug(f"Applying {len(changeset)} changes")
+        stale = set(self._stale)
+        changeset.call = Call(self, Payload(operation="composite", steps=changeset.steps))
+        if changeset.success:
+            self._applied(changeset, stale)
+        return changeset
+
+    def query(self, pattern: Union[Addresses, str], where = None, select = None, fresh: bool = False, include_runtime: bool = False) -> QueryResult:
+        '''
+        Find resources matching address pattern (any resource name can be `*`) and filter and project their values
+        locally. Values read on connect are used when they cover the pattern, so query costs no call; otherwise, or
+        when fresh data is requested, values are read with single (wildcard) recursive read-resource.
+
+            >>> jboss.query('/subsystem=datasources/data-source=*', where='"min-pool-size" < `5`', select='"jndi-name"').result
+            {'/subsystem=datasources/data-source=ExampleDS': 'java:jboss/datasources/ExampleDS'}
+            >>> jboss.query('/deployment=*', where={'enabled': False}).addresses()
+            ['/deployment=old.war']
+
+        :param pattern (required): Address pattern, like '/subsystem=datasources/data-source=*'. Address of model
+            (like '/deployment') matches all its resources
+        :param where (optional): jmespath expression, dict of {attribute: value} (looked up in per-attribute index)
+            or function taking values of resource and returning True for resources to keep
+        :param select (optional): jmespath expression or list of attribute names; whole values of resource if not set
+        :param fresh (optional, False): Read values from server instead of values read on connect
+        :param include_runtime (optional, False): Include runtime attributes, which means values are read from server
+        :return: Instance of QueryResult
+        '''
+        key = PathIndex.key(pattern)
+        if len(key) % 2:
+            key = key + ("*",)
+
+        if not fresh and not include_runtime:
+            # Longest address without wildcards is looked up in values read on connect, rest of pattern is expanded
+            prefix = key
+            for i in range(1, len(key), 2):
+                if key[i] == "*":
+                    prefix = key[:i - 1]
+                    break
+            found, values = self._snapshot_value(prefix, covers=key)
+            if found:
+                matches = self._query_index.matches(key, lambda: expand(values, key[len(prefix):], prefix))
+                return QueryResult(evaluate(matches, where, select, self._query_index, key))
+
+        res = Call(self, Payload(Addresses(*key), READ_RESOURCE, recursive=True, **{"include-runtime": include_runtime}, **self._read_args))
+        if isinstance(res.result, list):
+            # Wildcard address returns result of each matched resource
+            matches = [ (Addresses.key(step["address"]), step["result"])
+                        for step in res.result if step.get("outcome") == "success" ]
+        else:
+            matches = [(key, res.result)] if res.success and isinstance(res.result, dict) else []
+        return QueryResult(evaluate(matches, where, select), res)
+
+    def _snapshot_value(self, key: tuple, covers: Optional[tuple] = None) -> tuple:
+        '''
+        Return (True, values) of resource under key from values read on connect, or (False, None) if they don't cover
+        it (or address `covers`, if given) or something was written under it since.
+        '''
+        if self._initial_values is None:
+            return False, None
+        covers = key if covers is None else covers
+        if self.scope and not any( covers[:len(prefix)] == prefix for prefix in map(PathIndex.key, self.scope) ):
+            return False, None
+        if any( _overlaps(covers, written) for written in self._stale ):
+            return False, None
+        values = self._initial_values
+        for i in range(0, len(key), 2):
+            values = (values.get(key[i]) or {}).get(key[i + 1])
+            if values is None:
+                break
+        return True, values
+
+    def _description_of(self, key: tuple) -> Optional[dict]:
+        '''
+        Return description of resource under key from loaded model description, None if it isn't loaded.
+        '''
+        description = self._resource_description if self.root is not None else None
+        for i in range(0, len(key), 2):
+            if description is None:
+                break
+            models = (description['children'].get(key[i]) or {}).get('model-description') or {}
+            description = models.get(key[i + 1]) or models.get('*')
+        return description
+
+    def _applied(self, changeset: Changeset, stale: set):
+        '''
+        Update built models and values read on connect after changes were applied. Addresses written by changeset
+        are trusted again, unless they were already written (outside of apply) before.
+        '''
+        self._query_index.clear()
+        for action, key, name, _, value in changeset:
+            if key not in stale:
+                self._stale.discard(key)
+            model = _built_node(self.root, key[:-1]) if action != "write-attribute" else None
+            if isinstance(model, Model) and hasattr(model, '_names_cache'):
+                if action == ADD and key[-1] not in model._names:
+                    model._added(key[-1])
+                elif action == "remove":
+                    model._forget(key[-1])
+
+            # Written attribute belongs to resource under key, added or removed resource to its parent
+            found, values = self._snapshot_value(key if action == "write-attribute" else key[:-2])
+            if not found or values is None:
+                continue
+            if action == ADD:
+                if values.get(key[-2]) is None:
+                    values[key[-2]] = {}
+                values[key[-2]][key[-1]] = dict(value)
+            elif action == "remove":
+                (values.get(key[-2]) or {}).pop(key[-1], None)
+            else:
+                values[name] = value
+
+    def memory_usage(self) -> dict:
+        '''
+        Report memory used by nodes of the model that were built so far (not counting shared resource descriptions).
+        Returns dict with number of nodes, total bytes and average bytes per node.
+        '''
+        nodes, size = 0, 0
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            size += node._sizeof()
+            stack.extend(node._materialized())
+        return {"nodes": nodes, "bytes": size, "bytes_per_node": size // nodes if nodes else 0}
+
+    def close(self):
+        '''
+        Close all pooled connections to WildFly API
+        '''
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def batch(self, rollback_on_failure: bool = True):
+        '''
+        Group multiple operations into single composite call. While batch is active, `Operation.__call__`,
+        `ResourceAttributes.__setitem__` and `Model.add` queue their payloads instead of sending them, and
+        each returns (or, for attributes, creates) a `BatchStep` that gets populated once batch is sent.
+
+            >>> with jboss.batch() as batch:
+            ...     jboss.root.subsystem.logging.periodic_rotating_file_handler.FILE.attributes['suffix'] = '.yyyy-MM-dd'
+            ...     res = jboss.root.subsystem.logging.logger.add('org.example', level='DEBUG')
+            >>> batch.success, res.success
+
+        Operations are queued only inside `with` block, and batch is sent when the block exits without exception.
+        Nested batches join the outermost one, so they must use the same `rollback_on_failure`.
+
+        :param rollback_on_failure (optional, True): If any step fails, roll back all the steps
+        '''
+        if self._batch is not None:
+            if self._batch.rollback_on_failure != rollback_on_failure:
+                raise ValueError(f"Nested batch can't change rollback_on_failure of active batch ({self._batch.rollback_on_failure})")
+            return self._batch
+        return Batch(self, rollback_on_failure)
+
+    def deploy(self, path: str, name: Optional[str] = None, enabled: bool = True, replace: bool = False, runtime_name: Optional[str] = None,
+               progress = None, chunk_size: int = 1048576):
+        '''
+        Upload archive (WAR, EAR, JAR ...) to Wildfly and deploy it. File is streamed from disk to `/management-upload`
+        in chunks, so memory used doesn't depend on size of archive. On success, deployment is registered under
+        `root.deployment`. Upload is always sent immediately, even if batch is active.
+
+            >>> res = jboss.deploy('/tmp/app.war', progress=lambda sent, total: print(f"{sent * 100 // total}%"))
+            >>> res.raise_for_status()
+            >>> jboss.root.deployment['app.war'].attributes['enabled']
+
+        :param path (required): Path to archive
+        :param name (optional): Name of deployment, defaults to file name
+        :param enabled (optional, True): Deploy archive right away
+        :param replace (optional, False): Replace existing deployment with same name (full-replace-deployment)
+        :param runtime_name (optional): Runtime name of deployment, defaults to name
+        :param progress (optional): Function called with (bytes_sent, bytes_total) as upload progresses
+        :param chunk_size (optional, 1048576): Size of chunks in which file is read and sent
+        :return: Instance of DeploymentUpload
+        '''
+        name = name or os.path.basename(path)
+        operation = {"content": [{"input-stream-index": 0}], "enabled": enabled}
+        if runtime_name:
+            operation["runtime-name"] = runtime_name
+        if replace:
+            operation.update({"operation": "full-replace-deployment", "address": [], "name": name})
+        else:
+            operation.update({"operation": ADD, "address": [{"deployment": name}]})
+
+        upload = DeploymentUpload(self, operation, path, progress, chunk_size)
+        if upload.success and self.root is not None and 'deployment' in self.root:
+            deployments = self.root['deployment']
+            if name not in deployments:
+                deployments._added(name)
+        return upload
 
     def reload(self):
         log.debug("Asked to reload.")
@@ -91,62 +610,124 @@ class JbossConnection(object):
             warn("Server reload required", ReloadServer)
 
 class Call(object):
+    # Exceptions meaning WildFly API couldn't be reached
+    _connection_errors = (ConnectionError,)
+
     def __init__(self, client: JbossConnection, payload: Union[dict, list, Payload]):
         self.client = client
-        address = client.address
-        user = client.username
-        password = client.password
-        ssl_verify = client.ssl_verify
 
         # Turn payload to json string
-        if isinstance(payload, (dict, list)):
-            payload = jdumps(payload)
-        elif isinstance(payload, Payload):
-            payload = jdumps(payload.to_dict())
-        else:
-            raise TypeError("Received payload type: %s but we need dict, list or instance of Payload class" % type(payload))
-        self.payload = payload
+        self._payload = self._payload_dict(payload)
+        self.payload = client.codec.dumps(self._payload)
 
-        # Create headers and authentication token
-        headers = {'content-type': 'application/json'}
-        authentication = HTTPDigestAuth(username=user, password=password)
-        
         # Memorize last payload and call result
-        client.last_payload = payload
+        client.last_payload = self.payload
         client.last_call = self
 
         self.reload_required = False
+        self.rolled_back = False
         self.exception = None
+        self.cached = False
+        self.request = None
+
+        debug = log.isEnabledFor(DEBUG)
+        event = self._started()
+        if self._from_cache(event, debug):
+            return
+
+        res = response = None
+        posted = parsed = None
         try:
-            log.debug(f"Running call with payload: {payload}")
-            res = post(address, auth=authentication, headers=headers, data=payload, verify=ssl_verify)
+            res = self._post(debug)
+            posted = perf_counter()
             self.request = res
-            log.debug(f"Call completed with status code: {res.status_code}")
-            res = res.json()
-        except JSONDecodeError as e:
-            log.exception(e)
-            self.exception = type(e).__name__
-            self.success = False
-            self.result = "Received response is not JSON. Status code: %s, text: %s" % (res.status_code, res.text)
-            warn(self.result, CallRaisedException)
-        except ConnectionError as e:
-            log.exception(e)
-            self.exception = type(e).__name__
-            self.success = False
-            self.result = "Cannot connect to host url %s." % (address)
-            warn(self.result, CallRaisedException)
+            if debug:
+                log.debug(f"Call completed with status code: {res.status_code}")
+            response = client.codec.loads(res.content)
+            parsed = perf_counter()
         except Exception as e:
-            log.exception(e)
-            self.exception = type(e).__name__
-            self.success = False
-            self.result = "Exception (%s) occurred. Error: %s" % (type(e).__name__, str(e))
-            warn(self.result, CallRaisedException)
+            self._failed(e, res)
         else:
-            self.success = True if res['outcome'] == "success" else False
-            self.result = res['result'] if 'result' in res else res['failure-description'] if 'failure-description' in res else None
-            if 'response-headers' in res and 'process-state' in res['response-headers'] and res['response-headers']['process-state'] == 'reload-required':
-                self.reload_required = True
-                client.reload_required = True
+            self._load_response(response)
+        self._finished(event, response, posted, parsed)
+
+    def _post(self, debug: bool):
+        '''
+        Send request and return response. Subclasses override this to send payload differently.
+        '''
+        if debug:
+            log.debug(f"Running call with payload: {self.payload}")
+        return self.client.session.post(self.client.address, data=self.payload.encode(), timeout=self.client.timeout)
+
+    def _request_size(self) -> int:
+        return len(self.payload)
+
+    def _started(self) -> Optional[CallEvent]:
+        # Instrumentation - event is built only if someone is listening
+        client = self.client
+        event = CallEvent(self._payload, self._request_size()) if client.pre_call_hooks or client.post_call_hooks else None
+        if event is not None:
+            run_hooks(client.pre_call_hooks, event)
+        return event
+
+    def _from_cache(self, event: Optional[CallEvent], debug: bool) -> bool:
+        '''
+        Serve read operation from cache when possible. Returns True if call was served.
+        '''
+        client = self.client
+        if client.read_cache is None:
+            return False
+        cached = client.read_cache.get(self._payload)
+        if cached is None:
+            return False
+        if debug:
+            log.debug(f"Serving call from read cache: {self.payload}")
+        self.cached = True
+        self._load_response(cached)
+        if event is not None:
+            event._complete(self)
+            run_hooks(client.post_call_hooks, event)
+        return True
+
+    def _failed(self, e: Exception, res = None):
+        log.exception(e)
+        self.exception = type(e).__name__
+        self.success = False
+        if isinstance(e, self.client.codec.errors):
+            self.result = "Received response is not JSON. Status code: %s, text: %s" % (res.status_code, res.text)
+        elif isinstance(e, self._connection_errors):
+            self.result = "Cannot connect to host url %s." % (self.client.address)
+        else:
+            self.result = "Exception (%s) occurred. Error: %s" % (type(e).__name__, str(e))
+        warn(self.result, CallRaisedException)
+
+    def _finished(self, event: Optional[CallEvent], response: Optional[dict], posted: Optional[float] = None, parsed: Optional[float] = None):
+        client = self.client
+        # Store read results, or invalidate cached results affected by this call (even if it failed half-way)
+        if client.read_cache is not None:
+            client.read_cache.update(self._payload, response)
+        if client._initial_values is not None:
+            _mark_stale(client._stale, self._payload)
+
+        if event is not None:
+            event._complete(self, posted, parsed)
+            run_hooks(client.post_call_hooks, event)
+
+    @staticmethod
+    def _payload_dict(payload: Union[dict, list, Payload]):
+        if isinstance(payload, (dict, list)):
+            return payload
+        elif isinstance(payload, Payload):
+            return payload.to_dict()
+        raise TypeError("Received payload type: %s but we need dict, list or instance of Payload class" % type(payload))
+
+    def _load_response(self, res: dict):
+        self.success = True if res['outcome'] == "success" else False
+        self.result = res['result'] if 'result' in res else res['failure-description'] if 'failure-description' in res else None
+        self.rolled_back = res.get('rolled-back', False)
+        if 'response-headers' in res and 'process-state' in res['response-headers'] and res['response-headers']['process-state'] == 'reload-required':
+            self.reload_required = True
+            self.client.reload_required = True
 
     def raise_for_status(self):
         if not self.success:
@@ -167,25 +748,449 @@ class Call(object):
     def __repr__(self):
         return "JbossResult(success=%s,result=%s,reload_required=%s)" % (self.success, self.result, self.reload_required)
 
-class RootPath(dict):
+class DeploymentUpload(Call):
+    def __init__(self, client: JbossConnection, operation: dict, path: str, progress = None, chunk_size: int = 1048576):
+        '''
+        Call sending operation together with file streamed from disk to `/management-upload` endpoint.
+        Use through `JbossConnection.deploy()`.
+
+        :param client (required): Instance of JbossConnection
+        :param operation (required): Operation referencing uploaded file with {"input-stream-index": 0}
+        :param path (required): Path to file to upload
+        :param progress (optional): Function called with (bytes_sent, bytes_total) as upload progresses
+        :param chunk_size (optional, 1048576): Size of chunks in which file is read and sent
+        '''
+        self.path = path
+        self._body = MultipartBody(path, operation, chunk_size, progress)
+        self.size = len(self._body)
+        try:
+            super().__init__(client, operation)
+        finally:
+            self._body.close()
+
+    def _post(self, debug: bool):
+        address = self.client.address.rsplit("/", 1)[0] + "/management-upload"
+        log.debug(f"Uploading {self.path} ({self.size} bytes) to {address}")
+        return self.client.session.post(address, data=self._body, headers={"content-type": self._body.content_type}, timeout=self.client.timeout)
+
+    def _request_size(self) -> int:
+        return self.size
+
+    def __repr__(self):
+        return "JbossDeploymentUpload(path=%s,success=%s,result=%s,reload_required=%s)" % (self.path, self.success, self.result, self.reload_required)
+
+class BatchStep(Call):
+    '''
+    Call-like object representing single step of a `Batch`. Attributes `success`, `result`, `reload_required`
+    and `rolled_back` are None/False until batch is sent.
+    '''
+    def __init__(self, client: JbossConnection, payload: Union[dict, Payload]):
+        self.client = client
+        self.step = self._payload_dict(payload)
+        self.payload = client.codec.dumps(self.step)
+        self.reload_required = False
+        self.rolled_back = False
+        self.exception = None
+        self.success = None
+        self.result = None
+        self._callbacks = []
+
+    def add_done_callback(self, callback):
+        '''
+        Register function that will be called with this step as argument once batch is sent.
+        '''
+        self._callbacks.append(callback)
+
+    def _complete(self, res: dict = None, exception: str = None, result = None, rolled_back: bool = False):
+        if res is not None:
+            self._load_response(res)
+            if rolled_back:
+                self.success = False
+                self.rolled_back = True
+        else:
+            self.exception = exception
+            self.success = False
+            self.result = result
+        for callback in self._callbacks:
+            callback(self)
+
+    def __repr__(self):
+        return "JbossBatchStep(success=%s,result=%s,reload_required=%s)" % (self.success, self.result, self.reload_required)
+
+class Batch(object):
+    '''
+    Collects operations and sends them as single `composite` operation. Use through `JbossConnection.batch()`.
+    '''
+    def __init__(self, client: JbossConnection, rollback_on_failure: bool = True):
+        self.client = client
+        self.rollback_on_failure = rollback_on_failure
+        self.steps = []
+        self.call = None
+        self._depth = 0
+
+    def add(self, payload: Union[dict, Payload]):
+        '''
+        Queue payload as a step of composite operation and return `BatchStep` that will hold its result.
+        '''
+        step = BatchStep(self.client, payload)
+        self.steps.append(step)
+        return step
+
+    def send(self):
+        '''
+        Send all queued steps in single composite call and populate each `BatchStep` with its own result.
+        '''
+        if self.call is not None:
+            raise UnsupportedOperation("send (batch already sent)")
+        # Operations made after batch is sent are not queued anymore
+        if self.client._batch is self:
+            self.client._batch = None
+        if not self.steps:
+            log.debug("Batch is empty, nothing to send.")
+            return None
+
+        payload = Payload(operation="composite", steps=[step.step for step in self.steps])
+        if not self.rollback_on_failure:
+            payload.add_key_value("operation-headers", {"rollback-on-runtime-failure": False})
+        log.debug(f"Sending batch with {len(self.steps)} steps.")
+        self.call = Call(self.client, payload)
+
+        results = self.call.result if isinstance(self.call.result, dict) else {}
+        for i, step in enumerate(self.steps, 1):
+            if f"step-{i}" in results:
+                step._complete(results[f"step-{i}"], rolled_back=self.call.rolled_back)
+            else:
+                step._complete(exception=self.call.exception, result=self.call.result)
+        return self.call
+
+    @property
+    def success(self):
+        return self.call.success if self.call else None
+
+    @property
+    def rolled_back(self):
+        return self.call.rolled_back if self.call else False
+
+    def raise_for_status(self):
+        if self.call:
+            self.call.raise_for_status()
+
+    def __enter__(self):
+        if not self._depth:
+            if self.call is not None:
+                raise UnsupportedOperation("with (batch already sent)")
+            if self.client._batch is not None:
+                raise UnsupportedOperation("with (another batch is active)")
+            self.client._batch = self
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth:
+            return
+        if self.client._batch is self:
+            self.client._batch = None
+        if exc_type is None:
+            self.send()
+        else:
+            log.debug("Exception raised inside batch, discarding queued steps.")
+
+    def __repr__(self):
+        return "JbossBatch(steps=%s,success=%s,rolled_back=%s)" % (len(self.steps), self.success, self.rolled_back)
+
+def _scope_merge(tree: dict, prefix: tuple, value: dict, resource: dict):
+    '''
+    Place value (description or values) of branch under prefix into tree, creating parent resources as copies of `resource`.
+    Description trees alternate between resource descriptions and their 'model-description', value trees are plain nested dicts.
+    '''
+    description = "children" in resource
+    node = tree
+    for i, element in enumerate(prefix):
+        last = i == len(prefix) - 1
+        if i % 2 == 0:
+            # Child type
+            node = node["children"].setdefault(element, {"description": None, "model-description": {}})["model-description"] if description else node.setdefault(element, {})
+            if last:
+                if description:
+                    node["*"] = value
+                else:
+                    node.update(value)
+        elif last:
+            node[element] = value
+        else:
+            node = node.setdefault(element, dict(resource, children={}) if description else {})
+
+def _loaded_models(node) -> list:
+    '''
+    Return expandable models with already loaded children under node (including node itself), grouped by depth.
+    '''
+    levels = []
+    current = [node]
+    while current:
+        models = [ n for n in current if isinstance(n, Model) and n._expandable and hasattr(n, '_names_cache') ]
+        if models:
+            levels.append(models)
+        current = [ child for n in current for child in n._materialized() ]
+    return levels
+
+def _mark_stale(stale: set, payload: dict):
+    '''
+    Add addresses written by payload (or by steps of composite payload) to set of stale addresses.
+    '''
+    if not isinstance(payload, dict):
+        return
+    operation = payload.get("operation")
+    if operation == "composite":
+        for step in payload.get("steps", []):
+            _mark_stale(stale, step)
+    elif operation not in FLUSH_OPERATIONS and not is_read_operation(operation):
+        stale.add(PathIndex.key(payload.get("address")))
+
+def _overlaps(key: tuple, other: tuple) -> bool:
+    '''
+    Check if one of addresses is under the other one. Pattern elements (`*`) match any name.
+    '''
+    return all( a == b or a == "*" or b == "*" for a, b in zip(key, other) )
+
+def _built_node(node, key: tuple):
+    '''
+    Return node under key if it (and all nodes above it) were already built, None otherwise.
+    '''
+    for name in key:
+        if node is None:
+            break
+        node = dict.get(node, name)
+    return node
+
+def _is_detached(model, changes: dict) -> bool:
+    '''
+    Check if model is under resource that was removed by refresh.
+    '''
+    key = model._index_key
+    for address, (_, removed) in changes.items():
+        parent = PathIndex.key(address)
+        if key[:len(parent)] == parent and len(key) > len(parent) and key[len(parent)] in removed:
+            return True
+    return False
+
+def _apply_refresh(models: list, res) -> dict:
+    '''
+    Sync models with results of composite read-children-names call, one step per model.
+    '''
+    if not isinstance(res.result, dict):
+        res.raise_for_status()
+    changes = {}
+    for i, model in enumerate(models, 1):
+        step = res.result.get(f"step-{i}")
+        # Steps of failed composite are rolled back, but results of reads that didn't fail themselves are still valid
+        if not step or "failure-description" in step or "result" not in step:
+            log.debug(f"Failed to refresh {model._address}: {step}")
+            continue
+        added, removed = model._sync_names(step.get("result") or [])
+        if added or removed:
+            changes[model._address] = (added, removed)
+    return changes
+
+class PathIndex(object):
+    '''
+    Index of model nodes by their path, e.g. ('subsystem', 'datasources', 'data-source', 'ExampleDS'). Filled
+    as paths are resolved and pruned when resources are removed, so that nodes are never stale.
+    '''
+    def __init__(self):
+        self._nodes = {}
+
+    key = staticmethod(Addresses.key)
+
+    def resolve(self, root: "Node", path: Union[Addresses, str, list, tuple]) -> "Node":
+        '''
+        Return node under path, walking down from closest indexed parent if path isn't indexed yet.
+        Raises KeyError if path doesn't exist.
+        '''
+        key = self.key(path)
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+        if not key:
+            return root
+
+        depth = len(key) - 1
+        while depth and key[:depth] not in self._nodes:
+            depth -= 1
+        node = self._nodes[key[:depth]] if depth else root
+        for i in range(depth, len(key)):
+            node = node[key[i]]
+            self._nodes[key[:i + 1]] = node
+        return node
+
+    def add(self, key: tuple, node: "Node"):
+        self._nodes[key] = node
+
+    def discard(self, key: tuple):
+        '''
+        Drop node under given key and all nodes below it.
+        '''
+        self._nodes.pop(key, None)
+        size = len(key)
+        for _key in [ k for k in self._nodes if len(k) > size and k[:size] == key ]:
+            del self._nodes[_key]
+
+    def clear(self):
+        self._nodes.clear()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __repr__(self):
+        return "PathIndex(nodes=%s)" % len(self._nodes)
+
+class Node(dict):
+    '''
+    Base class for nodes in model tree. Children are not built upfront - only their names are known, and
+    child node is created the first time it's accessed, either as item (`node['child-name']`) or as
+    attribute (`node.child_name`). Subclasses provide `_load_names()` and `_build(name)`.
+
+    Nodes use `__slots__` and keep only references to (shared) resource descriptions, so that models with
+    thousands of resources stay small.
+    '''
+    __slots__ = ('_names_cache', '_pynames_cache')
+
+    def _load_names(self) -> list:
+        raise NotImplementedError
+
+    def _build(self, name: str):
+        raise NotImplementedError
+
+    @property
+    def _names(self):
+        try:
+            return self._names_cache
+        except AttributeError:
+            self._names_cache = dict.fromkeys(self._load_names())
+            return self._names_cache
+
+    @property
+    def _pynames(self):
+        try:
+            return self._pynames_cache
+        except AttributeError:
+            self._pynames_cache = { pyattr(name): name for name in self._names }
+            return self._pynames_cache
+
+    def _register(self, name: str, node = None):
+        '''
+        Add child name (and optionally already built node) to this node.
+        '''
+        self._names[name] = None
+        self._pynames[pyattr(name)] = name
+        if node is not None:
+            dict.__setitem__(self, name, node)
+            self._connection._index.add(self._index_key + (name,), node)
+
+    def _forget(self, name: str):
+        '''
+        Drop child from this node, e.g. after it was removed from the server.
+        '''
+        self._names.pop(name, None)
+        self._pynames.pop(pyattr(name), None)
+        dict.pop(self, name, None)
+        self._connection._index.discard(self._index_key + (name,))
+
+    def _materialized(self):
+        '''
+        Return list of child nodes that were already built.
+        '''
+        return list(dict.values(self))
+
+    def _sizeof(self) -> int:
+        '''
+        Return number of bytes used by this node itself, not counting shared descriptions and child nodes.
+        '''
+        size = sys.getsizeof(self)
+        for slot in ('_names_cache', '_pynames_cache'):
+            try:
+                size += sys.getsizeof(getattr(self, slot))
+            except AttributeError:
+                pass
+        return size
+
+    def __missing__(self, key):
+        if key not in self._names:
+            raise KeyError(key)
+        node = self._build(key)
+        dict.__setitem__(self, key, node)
+        return node
+
+    def __getattr__(self, name):
+        # Called only when regular attribute lookup fails, so this is where lazy children are resolved
+        if name.startswith('_') or name not in self._pynames:
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+        return self[self._pynames[name]]
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(self._pynames)
+
+    def __contains__(self, key):
+        return key in self._names
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def get(self, key, default = None):
+        return self[key] if key in self._names else default
+
+    def keys(self):
+        return self._names.keys()
+
+    def values(self):
+        return [ self[name] for name in list(self._names) ]
+
+    def items(self):
+        return [ (name, self[name]) for name in list(self._names) ]
+
+class RootPath(Node):
+    __slots__ = ('_connection', '_child', '_address')
+
     def __init__(self, connection: JbossConnection, children: dict, address = "/"):
         self._connection = connection
-        self._dict = {}
+        self._child = children
+        self._address = address
+
+    _index_key = ()
 
-        for child in children['children']:
-            if children['children'][child].get('model-description'):
-                _child = Model(self._connection, children['children'][child], "%s%s" % (address, child))
-                setattr(self, pyattr(child), _child)
-                self._dict[child] = _child
+    def _load_names(self):
+        return [ child for child in self._child['children'] if self._child['children'][child].get('model-description') ]
 
-        super().__init__(**self._dict)
+    def _build(self, name: str):
+        return self._model_class(self._connection, self._child['children'][name], "%s%s" % (self._address, name))
+
+    def __repr__(self):
+        return f"RootPath(Children={[ k for k in self.keys()]})"
 
 class ResourceAttributes:
+    __slots__ = ('_resource',)
+
     def __init__(self, child):
-        self._connection = child._connection
-        self._attributes = child._child['attributes']
-        self._address = child._address
-        self._keys = child._child['attributes'].keys()
+        self._resource = child
+
+    @property
+    def _connection(self):
+        return self._resource._connection
+
+    @property
+    def _attributes(self):
+        return self._resource._child['attributes']
+
+    @property
+    def _address(self):
+        return self._resource._address
+
+    @property
+    def _keys(self):
+        return self._resource._child['attributes'].keys()
 
     def __getitem__(self, key):
         return Call(self._connection, Payload(self._address, **READ_ATTRIBUTE(key))).return_result_or_raise()
@@ -195,123 +1200,302 @@ class ResourceAttributes:
             _type = ATTR_TYPES[self._attributes[key]['type']['TYPE_MODEL_VALUE']]
             if not isinstance(value, _type):
                 raise ValueError(f"Value passed must be type of {_type}, not {type(value)}")
-        return Call(self._connection, Payload(self._address, **WRITE_ATTRIBUTE(key, value))).raise_for_status()
+        payload = Payload(self._address, **WRITE_ATTRIBUTE(key, value))
+        if self._connection._batch:
+            self._connection._batch.add(payload)
+            return
+        return Call(self._connection, payload).raise_for_status()
+
+    def read_all(self, include_runtime: bool = True, include_defaults: bool = True) -> dict:
+        '''
+        Read values of all attributes of this resource with single read-resource call.
+
+        :param include_runtime (optional, True): Include runtime attributes (metrics, state) in result
+        :param include_defaults (optional, True): Include default values for attributes that are not set
+        '''
+        res = Call(self._connection, Payload(self._address, READ_RESOURCE, **{"include-runtime": include_runtime, "include-defaults": include_defaults}))
+        res.raise_for_status()
+        return { k: res.result[k] for k in self._keys if k in res.result }
+
+    def read(self, names: list, include_runtime: bool = True, include_defaults: bool = True) -> dict:
+        '''
+        Read values of listed attributes with single read-resource call.
+
+        :param names (required): List of attribute names
+        :param include_runtime (optional, True): Include runtime attributes (metrics, state) in result
+        :param include_defaults (optional, True): Include default values for attributes that are not set
+        '''
+        for name in names:
+            if name not in self._attributes:
+                raise KeyError(name)
+        values = self.read_all(include_runtime, include_defaults)
+        return { name: values.get(name) for name in names }
+
+    def keys(self):
+        return self._keys
+
+    def values(self):
+        return self.read_all().values()
+
+    def items(self):
+        return self.read_all().items()
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._attributes
 
     def __repr__(self):
-        return "ResourceAttributes(%s)" % { k:self[k] for k in self._attributes.keys()}
+        return "ResourceAttributes(%s)" % self.read_all()
 
 class ResourceOperations:
+    '''
+    Operations available on resource. Operation objects are created when accessed, e.g. `operations.read_resource`.
+    '''
+    __slots__ = ('_child',)
+
     def __init__(self, child):
-        self._list = []
+        self._child = child
+
+    @property
+    def _list(self):
+        return list(self._child._child['operations'])
+
+    def __getattr__(self, name):
+        if not name.startswith('_'):
+            operations = self._child._child['operations']
+            for op in operations:
+                if pyattr(op) == name:
+                    return self._operation_class(op, self._child, operations[op])
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+    def __dir__(self):
+        return list(super().__dir__()) + [ pyattr(op) for op in self._list ]
 
-        for op in child._child['operations']:
-            setattr(self, pyattr(op), Operation(op, child, child._child['operations'][op]))
-            self._list.append(op)
-    
     def __repr__(self) -> str:
         return f"Operations({self._list})"
-    
 
-class Model(dict):
+class Model(Node):
+    __slots__ = ('_address', '_connection', '_child', '_initial_run', 'description', '_expandable', '_resource_names')
+
     def __init__(self, connection: JbossConnection, child, address: str, initial_run = True):
         self._address = address
         self._connection = connection
         self._child = child
+        self._initial_run = initial_run
         self.description = child['description'] if 'description' in child else None
-        self._dict = {}
-        self._expandable = False
-
-        try: child['model-description']
-        except: pdb.set_trace()
-        # Recursively create resources under this Model
-        for subdir in child['model-description'].keys():
-            _child = child['model-description'][subdir]
-            # Sometime resource can be expanded, make sure we accomodate those
-            if subdir == '*':
-                self._expandable = True
-                _address = address.split("/")
-                _resource = _address.pop(-1)
-                _address = Addresses("/".join(_address))
-                if initial_run:
-                    jmespath_filter = _address.get_jmespath_filter() # + f'."{_resource}"'
-                    _children = jpsearch(jmespath_filter, self._connection._initial_values)
-                else:
-                    _children = Call(self._connection, Payload(_address, READ_RESOURCE)).result
+        self._expandable = '*' in child['model-description']
+
+    def _load_names(self):
+        names = [ subdir for subdir in self._child['model-description'] if subdir != '*' ]
 
-                if _children and _children[_resource]:
-                    for subdir in _children[_resource]:
-                        _subdir = Resource(self._connection, _child, "%s=%s" % (address, quote_plus(subdir)), self)
-                        setattr(self, pyattr(subdir), _subdir)
-                        self._dict[subdir] = _subdir
+        # Sometime resource can be expanded, make sure we accomodate those
+        if self._expandable:
+            _address = self._address.split("/")
+            _resource = _address.pop(-1)
+            _address = Addresses("/".join(_address))
+            if self._initial_run and self._connection._initial_values is not None:
+                _children = _address.get_compiled_jmespath_filter().search(self._connection._initial_values)
             else:
-                _subdir = Resource(self._connection, _child, "%s=%s" % (address, quote_plus(subdir)), self)
-                setattr(self, pyattr(subdir), _subdir)
-                self._dict[subdir] = _subdir
-        super().__init__(**self._dict)
+                _children = Call(self._connection, Payload(_address, READ_RESOURCE, **self._connection._read_args)).result
+
+            if isinstance(_children, dict) and _children.get(_resource):
+                # Dict keeps order and makes duplicate check constant time, models can have thousands of children
+                names = list(dict.fromkeys(names + list(_children[_resource])))
+        return names
+
+    @property
+    def _index_key(self):
+        return PathIndex.key(self._address)
+
+    def _refresh_payload(self) -> Payload:
+        _address = self._address.split("/")
+        _resource = _address.pop(-1)
+        return Payload(Addresses("/".join(_address)), READ_CHILDREN_NAMES, **{"child-type": _resource})
+
+    def _sync_names(self, names: list) -> tuple:
+        '''
+        Bring children of this model in line with list of names reported by server. Returns lists of added and removed names.
+        '''
+        static = self._child['model-description']
+        current = self._names
+        server = set(names)
+        added = [ name for name in names if name not in current ]
+        removed = [ name for name in current if name not in server and name not in static ]
+        for name in added:
+            self._added(name)
+        for name in removed:
+            self._forget(name)
+        return added, removed
+
+    def refresh(self) -> tuple:
+        '''
+        Compare children of this model with server, create resources added and drop resources removed outside
+        of this connection. Returns tuple of (added, removed) names.
+        '''
+        if not self._expandable:
+            raise UnsupportedOperation("refresh")
+        res = Call(self._connection, Payload(operation="composite", steps=[self._refresh_payload().to_dict()]))
+        return _apply_refresh([self], res).get(self._address, ([], []))
+
+    def _child_names(self, child: dict):
+        '''
+        Return names (and python-friendly names) of child models for given resource description. Result is computed
+        once and shared by all resources under this model using that description (e.g. all wildcard resources).
+        '''
+        try:
+            shared = self._resource_names
+        except AttributeError:
+            shared = self._resource_names = {}
+        try:
+            return shared[id(child)]
+        except KeyError:
+            names = dict.fromkeys( name for name in child['children'] if child['children'][name].get('model-description') )
+            shared[id(child)] = (names, { pyattr(name): name for name in names })
+            return shared[id(child)]
+
+    def _build(self, name: str):
+        _child = self._child['model-description'].get(name) or self._child['model-description']['*']
+        return self._resource_class(self._connection, _child, "%s=%s" % (self._address, quote_plus(name)), self, self._initial_run)
 
     def add(self, name: str, **kwargs):
         __doc__ = self._child['model-description']['*']['operations']['add']['description'] if self._expandable else None
         if self._expandable:
-            _res = Call(self._connection, Payload(f"{self._address}={name}", ADD, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs }))
+            payload = Payload(f"{self._address}={quote_plus(name)}", ADD, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs })
+            if self._connection._batch:
+                _res = self._connection._batch.add(payload)
+                _res.add_done_callback(lambda step: self._added(name) if step.success else None)
+                return _res
+            _res = Call(self._connection, payload)
             if _res.success:
-                _resource = Resource(connection = self._connection, child = self._child['model-description']['*'], address = "%s=%s" % (self._address, quote_plus(name)), parent = self, initial_run = False)
-                setattr(self, pyattr(name), _resource)
-                self._dict.__setitem__(name, _resource)
-                self.__setitem__(name, _resource)
+                self._added(name)
             return _res
         else:
             raise UnsupportedOperation("add")
 
+    def _added(self, name: str):
+        _resource = self._resource_class(connection = self._connection, child = self._child['model-description']['*'], address = "%s=%s" % (self._address, quote_plus(name)), parent = self, initial_run = False)
+        self._register(name, _resource)
+
+    def _sizeof(self) -> int:
+        size = super()._sizeof() + sys.getsizeof(self._address)
+        try:
+            size += sys.getsizeof(self._resource_names) + sum( sys.getsizeof(names) + sys.getsizeof(pynames) for names, pynames in self._resource_names.values() )
+        except AttributeError:
+            pass
+        return size
+
     def __repr__(self):
-        return f"Model({self._address}, Children={[ k for k in self._dict.keys()]})"
+        return f"Model({self._address}, Children={[ k for k in self.keys()]})"
+
+class Resource(Node):
+    __slots__ = ('_path', '_connection', '_child', '_parent', '_initial_run')
+    _model_class = Model
+    _attributes_class = ResourceAttributes
+    _operations_class = ResourceOperations
 
-class Resource(dict):
     def __init__(self, connection: JbossConnection, child, address: str, parent: Model, initial_run = True):
-        self._address = Addresses(address)
+        self._path = address
         self._connection = connection
         self._child = child
         self._parent = parent
-        self._dict = {}
+        self._initial_run = initial_run
 
-        # Recursively create any models below this resource
-        for child in self._child['children']:
-            if self._child['children'][child].get('model-description'):
-                _child = Model(self._connection, self._child['children'][child], "%s/%s" % (self._address.str_address, child), initial_run)
-                setattr(self, pyattr(child), _child)
-                self._dict[child] = _child
+    @property
+    def _address(self):
+        # Kept as string like address of Model, Payload turns it into Addresses only when call is made
+        return self._path
 
-        # Load dict
-        super().__init__(**self._dict)
-        
-        self.attributes = ResourceAttributes(self)
-        self.operations = ResourceOperations(self)
+    @property
+    def _index_key(self):
+        return PathIndex.key(self._path)
+
+    @property
+    def _names(self):
+        # Child models of resource are defined by its description, so names are shared with its siblings
+        return self._parent._child_names(self._child)[0]
+
+    @property
+    def _pynames(self):
+        return self._parent._child_names(self._child)[1]
+
+    def _load_names(self):
+        return list(self._names)
+
+    def _build(self, name: str):
+        return self._model_class(self._connection, self._child['children'][name], "%s/%s" % (self._path, name), self._initial_run)
+
+    def _sizeof(self) -> int:
+        return super()._sizeof() + sys.getsizeof(self._path)
+
+    @property
+    def attributes(self):
+        return self._attributes_class(self)
+
+    @property
+    def operations(self):
+        return self._operations_class(self)
 
     def __repr__(self):
-        return f"Resource({self._address.str_address}, {self.attributes}, Children={[ k for k in self._dict.keys()]})"
+        return f"Resource({self._path}, {self.attributes}, Children={[ k for k in self.keys()]})"
 
 class Operation:
+    __slots__ = ('_name', '_child', '_op_prop')
+
     def __init__(self, name: str, child: Resource, op_prop: dict):
         self._name = name
-        self._connection = child._connection
-        self._address = child._address
-        self._doc = op_prop['description']
-        self._props = list(op_prop['request-properties'].keys())
         self._op_prop = op_prop
         self._child = child
-        self._parent = child._parent
+
+    @property
+    def _connection(self):
+        return self._child._connection
+
+    @property
+    def _address(self):
+        return self._child._address
+
+    @property
+    def _parent(self):
+        return self._child._parent
+
+    @property
+    def _doc(self):
+        return self._op_prop['description']
+
+    @property
+    def _props(self):
+        return list(self._op_prop['request-properties'].keys())
 
     def __call__(self, **kwargs):
-        log.debug(f"Running operation '{self._name} with kwargs: {kwargs}")
-        res = Call(self._connection, Payload(self._address, self._name, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs }))
+        if log.isEnabledFor(DEBUG):
+            log.debug(f"Running operation '{self._name} with kwargs: {kwargs}")
+        payload = Payload(self._address, self._name, **{ k.replace("_", "-"): kwargs.get(k) for k in kwargs })
+        if self._connection._batch:
+            res = self._connection._batch.add(payload)
+            if self._name == 'remove':
+                res.add_done_callback(lambda step: self._removed() if step.success else None)
+            return res
+        res = Call(self._connection, payload)
         if self._name == 'remove' and res.success:
-            delattr(self._parent, self._address.str_address.split("=")[-1])
-            self._parent._dict.__delitem__(self._address.str_address.split("=")[-1])
-            self._parent.__delitem__(self._address.str_address.split("=")[-1])
+            self._removed()
         return res
+
+    def _removed(self):
+        self._parent._forget(unquote_plus(self._address.rsplit("=", 1)[-1]))
     
     @property
     def __doc__(self):
         return self._doc
     
     def __repr__(self):
-        return f"Operation(name={self._name}, kwargs={self._props})"
\ No newline at end of file
+        return f"Operation(name={self._name}, kwargs={self._props})"
+
+# Classes used when building model tree, these are overridden by async counterparts in aio.py
+RootPath._model_class = Model
+Model._resource_class = Resource
+ResourceOperations._operation_class = Operation
@@ -0,0 +1,214 @@
+'''
+Managed domain support - reading and running operations on servers of the domain through domain controller.
+
+Every server of the domain is reachable under `/host=<host>/server=<server>` of domain controller, so instead of
+connection per server, one connection to domain controller is used. Read operations on all running servers are sent
+as single request with wildcard address (`/host=*/server=*/...`); operations on subset of servers (server group,
+host) and operations that change something are sent as one composite, with step per server.
+'''
+from logging import DEBUG
+from typing import Optional, Union
+
+from .core import Call, JbossConnection
+from .helpers import Addresses, Payload
+from .logger import log
+from .operations import READ_ATTRIBUTE, READ_CHILDREN_NAMES, READ_RESOURCE
+
+class DomainServer(object):
+    __slots__ = ('host', 'name', 'group', 'status', 'auto_start')
+
+    def __init__(self, host: str, name: str, group: str, status: Optional[str] = None, auto_start: Optional[bool] = None):
+        '''
+        Server configured on host of the domain (`/host=<host>/server-config=<name>`).
+        '''
+        self.host = host
+        self.name = name
+        self.group = group
+        self.status = status
+        self.auto_start = auto_start
+
+    @property
+    def running(self) -> bool:
+        return self.status == "STARTED"
+
+    @property
+    def address(self) -> str:
+        '''
+        Address of running server, prefix of addresses of its resources.
+        '''
+        return f"/host={self.host}/server={self.name}"
+
+    def __repr__(self):
+        return "DomainServer(host=%s,name=%s,group=%s,status=%s)" % (self.host, self.name, self.group, self.status)
+
+class DomainResult(object):
+    def __init__(self, call: Call, steps: dict):
+        '''
+        Result of operation run on servers of the domain, split per server. `results` holds raw result of every
+        server ({"outcome": ..., "result": ...}), `result` results of servers where operation succeeded and
+        `failures` failure descriptions of the rest. Keys are (host, server) tuples.
+
+        :param call (required): Call sent to domain controller
+        :param steps (required): Dict of {(host, server): result}
+        '''
+        self.call = call
+        self.results = steps
+
+    @property
+    def result(self) -> dict:
+        return { server: step.get("result") for server, step in self.results.items() if step.get("outcome") == "success" }
+
+    @property
+    def failures(self) -> dict:
+        return { server: step.get("failure-description") for server, step in self.results.items() if step.get("outcome") != "success" }
+
+    @property
+    def success(self) -> bool:
+        return bool(self.call.success) and not self.failures
+
+    @property
+    def reload_required(self) -> bool:
+        return self.call.reload_required
+
+    def __getitem__(self, server: tuple):
+        return self.results[server]
+
+    def __iter__(self):
+        return iter(self.results.items())
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return "DomainResult(servers=%s,failures=%s)" % (len(self.results), len(self.failures))
+
+class Domain(object):
+    def __init__(self, connection: JbossConnection):
+        '''
+        Operations on hosts, server groups and servers of managed domain, sent through domain controller.
+
+            >>> from pyjboss_api.domain import Domain
+            >>> domain = Domain(JbossConnection('username', 'password', address='dc.example.com'))
+            >>> domain.servers(group='main-server-group')
+            >>> domain.read('/subsystem=datasources/data-source=ExampleDS', 'enabled').result
+            {('master', 'server-one'): True, ('slave1', 'server-two'): True}
+
+        :param connection (required): Instance of JbossConnection connected to domain controller
+        '''
+        self.connection = connection
+        self._servers = None
+
+    @property
+    def is_domain(self) -> bool:
+        '''
+        True if connection is made to domain controller.
+        '''
+        return self.connection.launch_type == "DOMAIN"
+
+    def _names(self, child_type: str) -> list:
+        return Call(self.connection, Payload([], READ_CHILDREN_NAMES, **{"child-type": child_type})).return_result_or_raise() or []
+
+    def hosts(self) -> list:
+        return self._names("host")
+
+    def server_groups(self) -> list:
+        return self._names("server-group")
+
+    def servers(self, group: Optional[str] = None, host: Optional[str] = None, running: bool = True, refresh: bool = False) -> list:
+        '''
+        Return list of DomainServer. Configurations of servers on all hosts are read with one call on first use
+        and kept, pass `refresh=True` to read them again (e.g. after servers were started or stopped).
+
+        :param group (optional): Only servers of this server group
+        :param host (optional): Only servers on this host
+        :param running (optional, True): Only started servers
+        :param refresh (optional, False): Read server configurations again
+        '''
+        if self._servers is None or refresh:
+            res = Call(self.connection, Payload("/host=*/server-config=*", READ_RESOURCE, **{"include-runtime": True}))
+            self._servers = []
+            for step in res.return_result_or_raise() or []:
+                if step.get("outcome") != "success":
+                    continue
+                values = step["result"]
+                self._servers.append(DomainServer(step["address"][0]["host"], step["address"][1]["server-config"],
+                                                  values.get("group"), values.get("status"), values.get("auto-start")))
+        return [ server for server in self._servers
+                 if (group is None or server.group == group) and (host is None or server.host == host) and (not running or server.running) ]
+
+    def _targets(self, group: Optional[str], host: Optional[str], servers: Optional[list]) -> Optional[list]:
+        if servers is not None:
+            return [ server if isinstance(server, DomainServer) else DomainServer(server[0], server[1], None, "STARTED") for server in servers ]
+        if group is None and host is None:
+            return None
+        return self.servers(group, host)
+
+    def _fan_out(self, path: str, operation: dict, targets: list, rollback_on_failure: bool) -> DomainResult:
+        steps = [ Payload(server.address + path, **operation).to_dict() for server in targets ]
+        payload = Payload(operation="composite", steps=steps)
+        if not rollback_on_failure:
+            payload.add_key_value("operation-headers", {"rollback-on-runtime-failure": False})
+        res = Call(self.connection, payload.to_dict())
+        results = res.result if isinstance(res.result, dict) else {}
+        return DomainResult(res, { (server.host, server.name): results.get(f"step-{i}") or {"outcome": "failed", "failure-description": res.result}
+                                   for i, server in enumerate(targets, 1) })
+
+    def read(self, path: Union[Addresses, str] = "/", attribute: Optional[str] = None, group: Optional[str] = None, host: Optional[str] = None,
+             servers: Optional[list] = None, **kwargs) -> DomainResult:
+        '''
+        Read resource (or its attribute) on servers of the domain. Without group, host or servers, all running
+        servers are read with single wildcard address (`/host=*/server=*<path>`), otherwise with one composite.
+
+            >>> domain.read('/subsystem=datasources/data-source=ExampleDS/statistics=pool', include_runtime=True, group='main-server-group')
+
+        :param path (optional, '/'): Address of resource on server
+        :param attribute (optional): Name of attribute, whole resource is read if not set
+        :param group (optional): Only servers of this server group
+        :param host (optional): Only servers on this host
+        :param servers (optional): List of DomainServer or (host, server) tuples
+        :param kwargs (optional): Arguments of read-resource, underscores are turned into dashes (include_runtime=True)
+        :return: Instance of DomainResult
+        '''
+        path = _path(path)
+        operation = READ_ATTRIBUTE(attribute) if attribute else dict({ k.replace("_", "-"): v for k, v in kwargs.items() }, operation=READ_RESOURCE)
+        targets = self._targets(group, host, servers)
+        if targets is not None:
+            return self._fan_out(path, operation, targets, False)
+
+        res = Call(self.connection, Payload(f"/host=*/server=*{path}", **operation).to_dict())
+        steps = {}
+        for step in res.result if isinstance(res.result, list) else []:
+            steps[(step["address"][0]["host"], step["address"][1]["server"])] = step
+        if log.isEnabledFor(DEBUG):
+            log.debug(f"Read {path} on {len(steps)} servers")
+        return DomainResult(res, steps)
+
+    def run(self, path: Union[Addresses, str], operation: str, group: Optional[str] = None, host: Optional[str] = None,
+            servers: Optional[list] = None, rollback_on_failure: bool = False, **kwargs) -> DomainResult:
+        '''
+        Run operation on servers of the domain (all running servers, if group, host or servers aren't given) with
+        one composite call to domain controller. Underscores in argument names are turned into dashes.
+
+            >>> domain.run('/subsystem=datasources/data-source=ExampleDS', 'flush-all-connection-in-pool', group='main-server-group')
+
+        :param path (required): Address of resource on server
+        :param operation (required): Name of operation
+        :param group (optional): Only servers of this server group
+        :param host (optional): Only servers on this host
+        :param servers (optional): List of DomainServer or (host, server) tuples
+        :param rollback_on_failure (optional, False): Roll back operation on all servers if it fails on any of them
+        :return: Instance of DomainResult
+        '''
+        targets = self._targets(group, host, servers)
+        if targets is None:
+            targets = self.servers()
+        params = { k.replace("_", "-"): v for k, v in kwargs.items() }
+        return self._fan_out(_path(path), dict(params, operation=operation), targets, rollback_on_failure)
+
+    def __repr__(self):
+        return "Domain(%s)" % self.connection.address
+
+def _path(path: Union[Addresses, str]) -> str:
+    if isinstance(path, Addresses):
+        return path.str_address
+    return "" if path in ("", "/") else "/" + path.lstrip("/")
@@ -0,0 +1,229 @@
+'''
+Run same operation across many WildFly servers in parallel.
+'''
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable, Iterator, Optional, Union
+
+from .core import Call, JbossConnection
+from .helpers import Addresses, Payload
+from .logger import log
+from .operations import READ_ATTRIBUTE, WRITE_ATTRIBUTE
+
+class FleetResult(object):
+    def __init__(self, host: str, call: Optional[Call] = None, exception: Optional[BaseException] = None, elapsed: float = 0.0):
+        '''
+        Outcome of running operation on single host of the fleet.
+
+        :param host (required): Host as it was passed to Fleet
+        :param call (optional): Instance of Call if operation was sent
+        :param exception (optional): Exception raised while connecting or running operation
+        :param elapsed (optional): Seconds spent on this host
+        '''
+        self.host = host
+        self.call = call
+        self.exception = exception
+        self.elapsed = elapsed
+
+    @property
+    def success(self) -> bool:
+        return self.exception is None and self.call is not None and bool(self.call.success)
+
+    @property
+    def result(self):
+        return self.call.result if self.call is not None else None
+
+    def __repr__(self):
+        if self.exception is not None:
+            return "FleetResult(host=%s,exception=%r)" % (self.host, self.exception)
+        return "FleetResult(host=%s,success=%s,result=%s)" % (self.host, self.success, self.result)
+
+class FleetReport(object):
+    def __init__(self, results: list):
+        '''
+        Aggregated results of running operation across the fleet. Failures are collected, never raised.
+        '''
+        self.results = results
+
+    @property
+    def successes(self) -> list:
+        return [ r for r in self.results if r.success ]
+
+    @property
+    def failures(self) -> list:
+        return [ r for r in self.results if not r.success ]
+
+    @property
+    def success(self) -> bool:
+        return not self.failures
+
+    def by_host(self) -> dict:
+        return { r.host: r for r in self.results }
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return "FleetReport(hosts=%s,successes=%s,failures=%s)" % (len(self.results), len(self.successes), len(self.failures))
+
+class Fleet(object):
+    def __init__(self, hosts: list, username: str, password: str, max_workers: int = 20, timeout: float = 30.0, **kwargs):
+        '''
+        Group of WildFly servers managed together. Connections are opened on first use (without loading the model)
+        and reused afterwards.
+
+            >>> from pyjboss_api.fleet import Fleet
+            >>> fleet = Fleet(['wf01', 'wf02:9993'], 'management', 'secret', max_workers=50, ssl=True)
+            >>> report = fleet.read_attribute('/subsystem=datasources/data-source=ExampleDS', 'enabled')
+            >>> report.failures
+
+        :param hosts (required): List of hosts, each either 'address' or 'address:port'
+        :param username (required): Username with admin privileges, same on all hosts
+        :param password (required): Password of user you're connecting with
+        :param max_workers (optional, 20): Maximum number of hosts being worked on at the same time
+        :param timeout (optional, 30.0): Connect and read timeout in seconds for every host
+        :param kwargs (optional): Any other argument accepted by JbossConnection (ssl, ssl_verify ...)
+        '''
+        assert isinstance(hosts, (list, tuple))
+        assert isinstance(max_workers, int) and max_workers > 0
+        self.hosts = list(hosts)
+        self.username = username
+        self.password = password
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._kwargs = kwargs
+        self._connections = {}
+        # Guards _connections and _host_locks; connection to each host is opened under its own lock, so slow or
+        # unreachable host doesn't block others, and host listed twice (or used by concurrent runs) is connected once
+        self._lock = Lock()
+        self._host_locks = {}
+
+    def connection(self, host: str) -> JbossConnection:
+        '''
+        Return (and open if needed) connection to given host.
+        '''
+        with self._lock:
+            connection = self._connections.get(host)
+            if connection is not None:
+                return connection
+            host_lock = self._host_locks.setdefault(host, Lock())
+
+        with host_lock:
+            with self._lock:
+                connection = self._connections.get(host)
+            if connection is None:
+                address, _, port = host.partition(":")
+                kwargs = dict(self._kwargs)
+                if port:
+                    kwargs['port'] = int(port)
+                kwargs.setdefault('load_model', False)
+                kwargs.setdefault('connect_timeout', self.timeout)
+                kwargs.setdefault('read_timeout', self.timeout)
+                # JbossConnection closes its session itself if host can't be connected to
+                connection = JbossConnection(self.username, self.password, address=address, **kwargs)
+                with self._lock:
+                    self._connections[host] = connection
+        return connection
+
+    def _run_one(self, host: str, task: Callable) -> FleetResult:
+        start = monotonic()
+        try:
+            call = task(self.connection(host))
+        except Exception as e:
+            log.debug(f"Fleet task failed on {host}: {e}")
+            return FleetResult(host, exception=e, elapsed=monotonic() - start)
+        return FleetResult(host, call=call, elapsed=monotonic() - start)
+
+    def stream(self, task: Union[Payload, dict, Callable], hosts: Optional[list] = None, max_workers: Optional[int] = None) -> Iterator[FleetResult]:
+        '''
+        Run task on every host and yield FleetResult for each host as soon as it finishes.
+
+        :param task (required): Payload (or dict) to send, or function accepting JbossConnection and returning Call
+        :param hosts (optional): Subset of hosts to run on, defaults to all hosts
+        :param max_workers (optional): Override fleet's concurrency limit for this run
+        '''
+        if not callable(task):
+            payload = task
+            task = lambda connection: Call(connection, payload)
+        hosts = self.hosts if hosts is None else hosts
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.max_workers, max(len(hosts), 1))) as executor:
+            futures = [ executor.submit(self._run_one, host, task) for host in hosts ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run(self, task: Union[Payload, dict, Callable], hosts: Optional[list] = None, max_workers: Optional[int] = None) -> FleetReport:
+        '''
+        Same as stream(), but waits for all hosts and returns FleetReport.
+        '''
+        return FleetReport(list(self.stream(task, hosts, max_workers)))
+
+    def operation(self, address: Union[Addresses, str], operation: str, **kwargs) -> FleetReport:
+        '''
+        Run operation under given address on all hosts. Underscores in argument names are turned into dashes.
+        '''
+        return self.run(Payload(address, operation, **{ k.replace("_", "-"): v for k, v in kwargs.items() }))
+
+    def read_attribute(self, address: Union[Addresses, str], name: str) -> FleetReport:
+        return self.run(Payload(address, **READ_ATTRIBUTE(name)))
+
+    def write_attribute(self, address: Union[Addresses, str], name: str, value) -> FleetReport:
+        return self.run(Payload(address, **WRITE_ATTRIBUTE(name, value)))
+
+    def query(self, pattern: Union[Addresses, str], where = None, select = None, fresh: bool = False, include_runtime: bool = False) -> FleetReport:
+        '''
+        Run query on all hosts, see JbossConnection.query(). Result of each host is dict of matched addresses.
+        '''
+        return self.run(lambda connection: connection.query(pattern, where, select, fresh, include_runtime))
+
+    def deploy(self, path: str, name: Optional[str] = None, enabled: bool = True, replace: bool = False, **kwargs) -> FleetReport:
+        '''
+        Upload archive and deploy it on all hosts. Every host streams file from disk on its own, see JbossConnection.deploy().
+        '''
+        return self.run(lambda connection: connection.deploy(path, name, enabled, replace, **kwargs))
+
+    def rolling_reload(self, max_parallel: int = 1, only_required: bool = True, wait_timeout: float = 300.0, poll_interval: float = 2.0) -> Iterator[FleetResult]:
+        '''
+        Reload hosts, making sure that no more than `max_parallel` of them are reloading at the same time. Host
+        is considered done once its `server-state` is back to 'running'. Results are yielded as hosts finish.
+
+        :param max_parallel (optional, 1): Maximum number of hosts reloading at the same time
+        :param only_required (optional, True): Reload only hosts reporting that reload is required
+        :param wait_timeout (optional, 300.0): Seconds to wait for host to come back after reload
+        :param poll_interval (optional, 2.0): Seconds between server-state checks while waiting
+        '''
+        def reload(connection: JbossConnection):
+            state = Call(connection, READ_ATTRIBUTE("server-state"))
+            if only_required and state.success and state.result == 'running':
+                return state
+            connection.reload()
+            deadline = monotonic() + wait_timeout
+            while monotonic() < deadline:
+                sleep(poll_interval)
+                state = Call(connection, READ_ATTRIBUTE("server-state"))
+                if state.success and state.result == 'running':
+                    return state
+            raise TimeoutError(f"Server did not come back within {wait_timeout} seconds after reload")
+
+        return self.stream(reload, max_workers=max_parallel)
+
+    def close(self):
+        '''
+        Close connections to all hosts.
+        '''
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return "Fleet(hosts=%s)" % len(self.hosts)
@@ -1,21 +1,21 @@
 import re
+from functools import lru_cache
 from typing import Optional, Union
 
 from urllib.parse import unquote_plus, quote_plus
 
+import jmespath
+
 class Addresses:
+    __slots__ = ('addresses', 'str_address')
+
     def __init__(self, *paths):
         self.addresses = []
         _path = []
         self.str_address = ""
 
         if len(paths) == 1 and paths[0].startswith("/"):
-            path: str = paths[0].lstrip("/")
-
-            # This fixes situation when resource is named '/'
-            path = f"={quote_plus('/')}".join(re.split('=/', path)).replace("=", "/")
-            
-            paths = [ unquote_plus(p) for p in path.split("/") ]
+            paths = self.split(paths[0])
 
         if len(paths) == 1:
             pass
@@ -28,6 +28,50 @@ class Addresses:
                 self.str_address = self.str_address + "/" + _path[0] + "=" + _path[1]
                 _path = []
 
+    @staticmethod
+    def split(path: str) -> list:
+        '''
+        Split string address into list of (unquoted) elements, e.g. '/subsystem=logging/logger' -> ['subsystem', 'logging', 'logger'].
+        '''
+        path = path.lstrip("/")
+        if not path:
+            return []
+
+        # This fixes situation when resource is named '/'
+        path = f"={quote_plus('/')}".join(re.split('=/', path)).replace("=", "/")
+
+        return [ unquote_plus(p) for p in path.split("/") ]
+
+    @staticmethod
+    def key(address: Optional[Union["Addresses", str, list, tuple, dict]]) -> tuple:
+        '''
+        Turn address into tuple of its elements, e.g. '/subsystem=logging/logger=com.example' (or instance of Addresses,
+        or address of payload [{'subsystem': 'logging'}, {'logger': 'com.example'}]) -> ('subsystem', 'logging', 'logger', 'com.example').
+        Tuples, and lists of elements, are treated as keys already.
+        '''
+        if not address:
+            return ()
+        if isinstance(address, str):
+            return _split_key(address)
+        if isinstance(address, Addresses):
+            address = address.addresses
+        elif isinstance(address, dict):
+            address = [address]
+        elif isinstance(address, tuple) or not isinstance(address[0], dict):
+            return tuple(address)
+        return tuple( item for element in address for pair in element.items() for item in pair )
+
+    @staticmethod
+    def format(key: tuple) -> str:
+        '''
+        Turn tuple of address elements back into string address, e.g. ('subsystem', 'logging') -> '/subsystem=logging'.
+        Key with odd number of elements ends with child type, ('deployment',) -> '/deployment'.
+        '''
+        address = "".join( f"/{key[i]}={key[i + 1]}" for i in range(0, len(key) - 1, 2) )
+        if len(key) % 2:
+            address += f"/{key[-1]}"
+        return address or "/"
+
     def add_path(self, directory: str, subdirectory: str):
         self.addresses.append({ directory: subdirectory })
 
@@ -44,6 +88,12 @@ class Addresses:
                 _pattern = _pattern + f'"{k}"."{v}"'
         return _pattern
 
+    def get_compiled_jmespath_filter(self):
+        '''
+        Same as get_jmespath_filter(), but returns compiled (and cached) expression.
+        '''
+        return compile_jmespath(self.get_jmespath_filter())
+
     def to_dict(self):
         return self.addresses
     
@@ -93,8 +143,27 @@ class Payload:
         else:
             raise TypeError("Address argument type invalid. Must be instance of Addresses class or str, dict.")
 
+@lru_cache(maxsize=65536)
+def _split_key(path: str) -> tuple:
+    return tuple(Addresses.split(path))
+
+@lru_cache(maxsize=4096)
+def compile_jmespath(expression: str):
+    '''
+    Helper to compile jmespath expression once and reuse it
+    '''
+    return jmespath.compile(expression)
+
 def pyattr(attr: str):
     '''
     Helper to return python-friendly attribute name
     '''
-    return attr.replace("-", "_")
\ No newline at end of file
+    return attr.replace("-", "_")
+
+def scalar(value) -> str:
+    '''
+    Helper to turn simple value into string the way server compares values - 5 and "5", or True and "true" are the same value
+    '''
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
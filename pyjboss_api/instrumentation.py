@@ -0,0 +1,265 @@
+'''
+Instrumentation of calls made to WildFly API.
+
+Functions registered with `JbossConnection.add_call_hook()` receive `CallEvent` before call is sent (pre hooks)
+and once it's completed (post hooks). `CallMetrics` is a post hook that aggregates events into per-operation
+latency histograms and error counts, which can be exported in Prometheus text format.
+'''
+from bisect import bisect_left
+from threading import Lock, local
+from time import perf_counter
+from typing import Optional, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .helpers import Addresses
+from .logger import log
+
+# Upper bounds (in seconds) of latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ("connect", "auth", "server", "transfer", "parse")
+
+# Seconds spent opening connections by current thread - requests are sent from thread that makes the call
+_connect_time = local()
+
+class _ConnectTimer(object):
+    def connect(self):
+        start = perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + perf_counter() - start
+
+class _TimedHTTPConnection(_ConnectTimer, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_ConnectTimer, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class TimingAdapter(HTTPAdapter):
+    '''
+    HTTPAdapter that records, on every response it returns, seconds spent opening connection (TCP and TLS handshake)
+    and seconds until response headers were received. Digest authentication sends request again after challenge
+    straight through adapter, so answered request is timed as well - `response.elapsed` of such response stays 0.
+    '''
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+    def send(self, request, *args, **kwargs):
+        connected = getattr(_connect_time, "seconds", 0.0)
+        start = perf_counter()
+        response = super().send(request, *args, **kwargs)
+        connect = getattr(_connect_time, "seconds", 0.0) - connected
+        response.pyjboss_timing = (connect, perf_counter() - start - connect)
+        return response
+
+def _timing(response) -> tuple:
+    # (connect, until headers) of response, for responses not sent through TimingAdapter (httpx) connection time is unknown
+    timing = getattr(response, "pyjboss_timing", None)
+    return timing if timing is not None else (0.0, response.elapsed.total_seconds())
+
+class CallEvent(object):
+    __slots__ = ('operation', 'address', 'request_bytes', 'response_bytes', 'status_code', 'outcome', 'exception',
+                 'cached', 'total', 'connect', 'auth', 'server', 'transfer', 'parse', 'call', '_start')
+
+    def __init__(self, payload: Union[dict, list], request_bytes: int):
+        '''
+        Details of single call, passed to call hooks. Times are in seconds:
+            total    - whole call, from sending request to parsed response
+            connect  - opening new connections (TCP and TLS handshake), 0 when pooled connection was reused
+                       and for AsyncJbossConnection, which doesn't measure it
+            auth     - authentication challenge round-trips (401 responses), without connecting
+            server   - from sending request until response headers were received (server processing and latency)
+            transfer - rest of the time until response was received: mostly downloading response body
+            parse    - decoding JSON response
+
+        :param payload (required): Payload as dict (or list)
+        :param request_bytes (required): Size of request body
+        '''
+        payload = payload if isinstance(payload, dict) else {}
+        self.operation = payload.get("operation") or "unknown"
+        self.address = Addresses.format(Addresses.key(payload.get("address")))
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.status_code = None
+        self.outcome = None
+        self.exception = None
+        self.cached = False
+        self.total = 0.0
+        self.connect = 0.0
+        self.auth = 0.0
+        self.server = 0.0
+        self.transfer = 0.0
+        self.parse = 0.0
+        self.call = None
+        self._start = perf_counter()
+
+    def _complete(self, call, posted: Optional[float] = None, parsed: Optional[float] = None, response_bytes: Optional[int] = None):
+        '''
+        Fill in outcome and timings once call is done. `posted` and `parsed` are perf_counter() values taken
+        after response was received and after it was parsed. Size of streamed response, whose content isn't
+        kept, is passed as `response_bytes`.
+        '''
+        self.total = perf_counter() - self._start
+        self.call = call
+        self.exception = call.exception
+        self.cached = bool(getattr(call, "cached", False))
+        self.outcome = "error" if call.exception else "success" if call.success else "failed"
+
+        request = getattr(call, "request", None)
+        if request is not None:
+            self.status_code = request.status_code
+            self.response_bytes = len(request.content) if response_bytes is None else response_bytes
+            for response in request.history:
+                connect, until_headers = _timing(response)
+                self.connect += connect
+                self.auth += until_headers
+            connect, self.server = _timing(request)
+            self.connect += connect
+        if posted is not None:
+            self.transfer = max(0.0, posted - self._start - self.connect - self.auth - self.server)
+            if parsed is not None:
+                self.parse = parsed - posted
+
+    def to_dict(self) -> dict:
+        return { name: getattr(self, name) for name in self.__slots__ if not name.startswith("_") and name != "call" }
+
+    def __repr__(self):
+        return "CallEvent(operation=%s,address=%s,outcome=%s,total=%.4f)" % (self.operation, self.address, self.outcome, self.total)
+
+def run_hooks(hooks: list, event: CallEvent):
+    '''
+    Run hooks with given event. Exceptions raised by hooks are logged, they never break the call.
+    '''
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as e:
+            log.exception(e)
+
+class _OperationStats(object):
+    __slots__ = ('buckets', 'count', 'sum', 'outcomes', 'phases', 'cached', 'request_bytes', 'response_bytes')
+
+    def __init__(self, buckets: int):
+        self.buckets = [0] * (buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.outcomes = {}
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.cached = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+class CallMetrics(object):
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, prefix: str = "pyjboss"):
+        '''
+        Post call hook aggregating calls per operation: latency histogram, outcomes, time spent in each phase and
+        transferred bytes. Safe to share between connections and threads.
+
+            >>> from pyjboss_api.instrumentation import CallMetrics
+            >>> metrics = CallMetrics()
+            >>> jboss.add_call_hook(post=metrics)
+            >>> print(metrics.to_prometheus())
+
+        :param buckets (optional): Upper bounds of latency histogram buckets in seconds
+        :param prefix (optional, 'pyjboss'): Prefix of exported metric names
+        '''
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._operations = {}
+        self._lock = Lock()
+
+    def __call__(self, event: CallEvent):
+        with self._lock:
+            stats = self._operations.get(event.operation)
+            if stats is None:
+                stats = self._operations[event.operation] = _OperationStats(len(self.buckets))
+            stats.buckets[bisect_left(self.buckets, event.total)] += 1
+            stats.count += 1
+            stats.sum += event.total
+            stats.outcomes[event.outcome] = stats.outcomes.get(event.outcome, 0) + 1
+            for phase in PHASES:
+                stats.phases[phase] += getattr(event, phase)
+            stats.cached += event.cached
+            stats.request_bytes += event.request_bytes
+            stats.response_bytes += event.response_bytes
+
+    def summary(self) -> dict:
+        '''
+        Return dict with count, errors, mean latency, time spent per phase and transferred bytes for each operation.
+        '''
+        with self._lock:
+            return {
+                operation: {
+                    "count": stats.count,
+                    "errors": stats.count - stats.outcomes.get("success", 0),
+                    "outcomes": dict(stats.outcomes),
+                    "cached": stats.cached,
+                    "seconds": stats.sum,
+                    "mean": stats.sum / stats.count if stats.count else 0.0,
+                    "phases": dict(stats.phases),
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                }
+                for operation, stats in self._operations.items()
+            }
+
+    def to_prometheus(self) -> str:
+        '''
+        Export metrics in Prometheus text exposition format.
+        '''
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_call_duration_seconds Duration of calls to WildFly management API.",
+            f"# TYPE {p}_call_duration_seconds histogram",
+        ]
+        with self._lock:
+            operations = sorted(self._operations.items())
+            for operation, stats in operations:
+                label = f'operation="{_escape(operation)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), stats.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{p}_call_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+                lines.append(f"{p}_call_duration_seconds_sum{{{label}}} {stats.sum}")
+                lines.append(f"{p}_call_duration_seconds_count{{{label}}} {stats.count}")
+
+            lines.append(f"# HELP {p}_calls_total Calls to WildFly management API by outcome (success, failed, error).")
+            lines.append(f"# TYPE {p}_calls_total counter")
+            for operation, stats in operations:
+                for outcome, count in sorted(stats.outcomes.items()):
+                    lines.append(f'{p}_calls_total{{operation="{_escape(operation)}",outcome="{outcome}"}} {count}')
+
+            lines.append(f"# HELP {p}_call_phase_seconds_total Time spent in each phase of calls.")
+            lines.append(f"# TYPE {p}_call_phase_seconds_total counter")
+            for operation, stats in operations:
+                for phase in PHASES:
+                    lines.append(f'{p}_call_phase_seconds_total{{operation="{_escape(operation)}",phase="{phase}"}} {stats.phases[phase]}')
+
+            for direction in ("request", "response"):
+                lines.append(f"# HELP {p}_call_{direction}_bytes_total Size of {direction} bodies.")
+                lines.append(f"# TYPE {p}_call_{direction}_bytes_total counter")
+                for operation, stats in operations:
+                    lines.append(f'{p}_call_{direction}_bytes_total{{operation="{_escape(operation)}"}} {getattr(stats, direction + "_bytes")}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def __repr__(self):
+        return "CallMetrics(operations=%s)" % len(self._operations)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,9 +1,13 @@
 ### BELOW ARE HELPERS / ALIASES TO OPERATION VALUES TO PASS IN Payload
 ADD = "add"
 READ_RESOURCE = "read-resource"
+READ_CHILDREN_NAMES = "read-children-names"
 
 def WRITE_ATTRIBUTE(name: str, value):
     return {"operation": "write-attribute", "name": name, "value": value}
 
 def READ_ATTRIBUTE(name: str):
     return {"operation": "read-attribute", "name": name}
+
+def READ_LOG_FILE(lines: int, skip: int = 0, tail: bool = True):
+    return {"operation": "read-log-file", "lines": lines, "skip": skip, "tail": tail}
@@ -0,0 +1,136 @@
+'''
+Local queries over values of resources - filters and projections evaluated in memory, without call per resource.
+
+Resources are selected by address pattern, where any resource name can be wildcard (`*`):
+`/subsystem=datasources/data-source=*` or `/deployment=*/subdeployment=*`. Values are taken from values read on
+connect, or from single (wildcard) read-resource when fresh data is requested.
+'''
+from typing import Callable, Optional, Union
+
+from .helpers import Addresses, compile_jmespath, scalar
+
+def _normalize(value):
+    # Values as server would compare them - 5 and "5", or True and "true" are the same value
+    if value is None or isinstance(value, (dict, list)):
+        return value
+    return scalar(value)
+
+def expand(values: Optional[dict], pattern: tuple, key: tuple = ()) -> list:
+    '''
+    Return list of (key, values) of resources matching pattern, found in recursive values of resource under key.
+    '''
+    if values is None:
+        return []
+    if not pattern:
+        return [(key, values)]
+    children = values.get(pattern[0]) or {}
+    if pattern[1] == "*":
+        names = list(children)
+    else:
+        names = [pattern[1]] if pattern[1] in children else []
+    matches = []
+    for name in names:
+        matches.extend(expand(children[name], pattern[2:], key + (pattern[0], name)))
+    return matches
+
+class QueryIndex(object):
+    def __init__(self):
+        '''
+        Resources matched by patterns and per-attribute indexes of their values ({value: keys}), built on first
+        use and dropped whenever values they were built from change.
+        '''
+        self._matches = {}
+        self._attributes = {}
+
+    def matches(self, pattern: tuple, build: Callable) -> list:
+        if pattern not in self._matches:
+            self._matches[pattern] = build()
+        return self._matches[pattern]
+
+    def lookup(self, pattern: tuple, attribute: str, value, matches: list) -> set:
+        '''
+        Return keys of resources matched by pattern, which have attribute set to value.
+        '''
+        index = self._attributes.get((pattern, attribute))
+        if index is None:
+            index = self._attributes[(pattern, attribute)] = {}
+            for key, values in matches:
+                _value = _normalize(values.get(attribute))
+                # Complex values (OBJECT, LIST) are not indexed
+                if not isinstance(_value, (dict, list)):
+                    index.setdefault(_value, set()).add(key)
+        return index.get(_normalize(value), set())
+
+    def clear(self):
+        self._matches.clear()
+        self._attributes.clear()
+
+    def __len__(self):
+        return len(self._attributes)
+
+    def __repr__(self):
+        return "QueryIndex(patterns=%s,attributes=%s)" % (len(self._matches), len(self._attributes))
+
+class QueryResult(object):
+    def __init__(self, result: dict, call = None):
+        '''
+        Resources matched by query - `result` is dict with address as key and value (or projection) of resource as value.
+        If fresh values were read from the server, `call` holds the Call.
+        '''
+        self.result = result
+        self.call = call
+
+    @property
+    def success(self) -> bool:
+        return self.call.success if self.call is not None else True
+
+    def addresses(self) -> list:
+        return list(self.result)
+
+    def __getitem__(self, address: str):
+        return self.result[address]
+
+    def __iter__(self):
+        return iter(self.result.items())
+
+    def __len__(self):
+        return len(self.result)
+
+    def __repr__(self):
+        return "QueryResult(matches=%s,fresh=%s)" % (len(self.result), self.call is not None)
+
+def evaluate(matches: list, where: Optional[Union[str, dict, Callable]] = None, select: Optional[Union[str, list, tuple]] = None,
+             index: Optional[QueryIndex] = None, pattern: Optional[tuple] = None) -> dict:
+    '''
+    Filter matched resources and project their values. Returns dict with address as key.
+
+    :param matches (required): List of (key, values) tuples
+    :param where (optional): jmespath expression, dict of {attribute: value} or function taking values of resource
+    :param select (optional): jmespath expression or list of attribute names
+    :param index (optional): QueryIndex used to evaluate dict filters, if given with pattern
+    :param pattern (optional): Pattern matches were found by
+    '''
+    if isinstance(where, dict):
+        if index is not None:
+            keys = None
+            for attribute, value in where.items():
+                found = index.lookup(pattern, attribute, value, matches)
+                keys = found if keys is None else keys & found
+            matches = [ (key, values) for key, values in matches if key in keys ] if keys is not None else matches
+        else:
+            expected = { attribute: _normalize(value) for attribute, value in where.items() }
+            matches = [ (key, values) for key, values in matches if all( _normalize(values.get(a)) == v for a, v in expected.items() ) ]
+    elif isinstance(where, str):
+        expression = compile_jmespath(where)
+        matches = [ (key, values) for key, values in matches if expression.search(values) ]
+    elif where is not None:
+        matches = [ (key, values) for key, values in matches if where(values) ]
+
+    if isinstance(select, str):
+        expression = compile_jmespath(select)
+        project = expression.search
+    elif select is not None:
+        project = lambda values: { name: values.get(name) for name in select }
+    else:
+        project = lambda values: values
+    return { Addresses.format(key): project(values) for key, values in matches }
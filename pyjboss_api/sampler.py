@@ -0,0 +1,277 @@
+'''
+Periodic sampling of runtime metrics (datasource pool statistics, request counts, memory usage ...).
+
+All metrics are read with single composite call per tick, and samples are kept in fixed-size ring buffers
+backed by `array`, so sampling hundreds of metrics every second costs one request per second and constant memory.
+'''
+from array import array
+from math import nan
+from threading import Event, Lock, Thread
+from time import monotonic, time
+from typing import Iterator, Optional, Union
+
+from .core import Call, JbossConnection
+from .helpers import Addresses, Payload
+from .logger import log
+from .operations import READ_ATTRIBUTE, READ_RESOURCE
+
+def _number(value) -> float:
+    '''
+    Turn attribute value into float, values that are not numbers (undefined, strings) become NaN.
+    '''
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return nan
+
+class RingBuffer(object):
+    __slots__ = ('size', '_timestamps', '_values', '_count', '_next')
+
+    def __init__(self, size: int):
+        '''
+        Fixed-size buffer of (timestamp, value) samples. Once full, oldest samples are overwritten.
+
+        :param size (required): Maximum number of samples kept
+        '''
+        assert isinstance(size, int) and size > 1
+        self.size = size
+        self._timestamps = array('d', bytes(8 * size))
+        self._values = array('d', bytes(8 * size))
+        self._count = 0
+        self._next = 0
+
+    def append(self, timestamp: float, value: float):
+        self._timestamps[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+
+    def _index(self, i: int) -> int:
+        # i-th sample counted from the oldest one, negative counts from the newest
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("sample index out of range")
+        return (self._next - self._count + i) % self.size
+
+    def __getitem__(self, i: int) -> tuple:
+        index = self._index(i)
+        return self._timestamps[index], self._values[index]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self) -> Iterator[tuple]:
+        for i in range(self._count):
+            yield self[i]
+
+    def timestamps(self) -> list:
+        return [ t for t, _ in self ]
+
+    def values(self) -> list:
+        return [ v for _, v in self ]
+
+    @property
+    def last(self) -> Optional[tuple]:
+        '''
+        Newest (timestamp, value) sample, or None if buffer is empty.
+        '''
+        return self[-1] if self._count else None
+
+    def delta(self, samples: int = 1) -> float:
+        '''
+        Difference between newest value and value `samples` samples before it. NaN if there aren't enough samples.
+        '''
+        if self._count <= samples:
+            return nan
+        return self[-1][1] - self[-1 - samples][1]
+
+    def rate(self, samples: int = 1) -> float:
+        '''
+        Change of value per second over last `samples` samples, e.g. requests per second from request counter.
+        '''
+        if self._count <= samples:
+            return nan
+        (t1, v1), (t0, v0) = self[-1], self[-1 - samples]
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else nan
+
+    def __repr__(self):
+        return "RingBuffer(size=%s,samples=%s,last=%s)" % (self.size, self._count, self.last)
+
+class Sampler(object):
+    def __init__(self, connection: JbossConnection, metrics: Optional[list] = None, size: int = 3600):
+        '''
+        Collect values of metrics with one composite call per tick. Metric is pair of address and attribute name;
+        fields of complex attributes can be sampled with dotted name, like 'heap-memory-usage.used'.
+
+            >>> from pyjboss_api.sampler import Sampler
+            >>> sampler = Sampler(jboss, [
+            ...     ('/subsystem=datasources/data-source=ExampleDS/statistics=pool', 'ActiveCount'),
+            ...     ('/subsystem=undertow/server=default-server/http-listener=default', 'request-count'),
+            ...     ('/core-service=platform-mbean/type=memory', 'heap-memory-usage.used'),
+            ... ])
+            >>> sampler.start(interval=1.0)
+            >>> sampler.rate('/subsystem=undertow/server=default-server/http-listener=default', 'request-count', samples=10)
+
+        :param connection (required): Instance of JbossConnection (model doesn't have to be loaded)
+        :param metrics (optional): List of (address, attribute) pairs
+        :param size (optional, 3600): Number of samples kept per metric
+        '''
+        self.connection = connection
+        self.size = size
+        self.buffers = {}
+        self.errors = 0
+        self.last_call = None
+        self._payload = None
+        self._steps = []
+        # Guards buffers, _payload and _steps - metrics can be added or removed while background thread samples
+        self._lock = Lock()
+        self._thread = None
+        self._stop = Event()
+        for address, attribute in metrics or []:
+            self.add(address, attribute)
+
+    @staticmethod
+    def _key(address: Union[Addresses, str], attribute: str) -> tuple:
+        if isinstance(address, Addresses):
+            return address.str_address, attribute
+        return Addresses(address).str_address, attribute
+
+    def add(self, address: Union[Addresses, str], attribute: str) -> RingBuffer:
+        '''
+        Start sampling attribute under address and return its buffer.
+        '''
+        key = self._key(address, attribute)
+        with self._lock:
+            if key not in self.buffers:
+                self.buffers[key] = RingBuffer(self.size)
+                self._payload = None
+            return self.buffers[key]
+
+    def remove(self, address: Union[Addresses, str], attribute: str):
+        '''
+        Stop sampling attribute under address and drop its samples.
+        '''
+        key = self._key(address, attribute)
+        with self._lock:
+            if self.buffers.pop(key, None) is not None:
+                self._payload = None
+
+    def _build_payload(self):
+        # Group metrics by address: single attribute is read with read-attribute, more of them with one read-resource.
+        # Steps keep buffers they fill, so removing metric doesn't affect tick that is already running.
+        grouped = {}
+        for (address, attribute), buffer in self.buffers.items():
+            grouped.setdefault(address, {}).setdefault(attribute.split(".")[0], []).append((attribute, buffer))
+
+        steps = []
+        self._steps = []
+        for address, attributes in grouped.items():
+            if len(attributes) == 1:
+                step = Payload(address, **READ_ATTRIBUTE(next(iter(attributes)))).to_dict()
+            else:
+                step = Payload(address, READ_RESOURCE, **{"include-runtime": True, "attributes-only": True}).to_dict()
+            steps.append(step)
+            self._steps.append((address, attributes))
+        payload = Payload(operation="composite", steps=steps)
+        payload.add_key_value("operation-headers", {"rollback-on-runtime-failure": False})
+        self._payload = payload.to_dict()
+
+    def sample(self) -> dict:
+        '''
+        Read all metrics once and append their values to buffers. Returns dict of {(address, attribute): value}
+        for this tick; metrics that couldn't be read get NaN.
+        '''
+        with self._lock:
+            if not self.buffers:
+                return {}
+            if self._payload is None:
+                self._build_payload()
+            payload, steps = self._payload, self._steps
+
+        timestamp = time()
+        res = Call(self.connection, payload)
+        self.last_call = res
+        results = res.result if isinstance(res.result, dict) else {}
+        if not res.success:
+            log.debug(f"Sampling call failed: {res.result}")
+
+        values = {}
+        for i, (address, attributes) in enumerate(steps, 1):
+            step = results.get(f"step-{i}") or {}
+            # Failed steps don't stop other metrics from being sampled
+            ok = "result" in step and "failure-description" not in step
+            if not ok:
+                self.errors += 1
+            for name, fields in attributes.items():
+                value = step.get("result") if ok else None
+                if ok and isinstance(value, dict) and len(attributes) > 1:
+                    value = value.get(name)
+                for attribute, buffer in fields:
+                    _value = value
+                    for field in attribute.split(".")[1:]:
+                        _value = _value.get(field) if isinstance(_value, dict) else None
+                    _value = _number(_value)
+                    buffer.append(timestamp, _value)
+                    values[(address, attribute)] = _value
+        return values
+
+    def run(self, interval: float = 1.0, count: Optional[int] = None):
+        '''
+        Sample every `interval` seconds until stop() is called or `count` ticks are done. Ticks are scheduled
+        at fixed rate, so time spent on call doesn't make sampling drift.
+
+        :param interval (optional, 1.0): Seconds between ticks
+        :param count (optional, None): Number of ticks, runs until stopped if not set
+        '''
+        self._stop.clear()
+        tick = monotonic()
+        done = 0
+        while not self._stop.is_set() and (count is None or done < count):
+            self.sample()
+            done += 1
+            tick += interval
+            delay = tick - monotonic()
+            if delay < 0:
+                # Call took longer than interval, skip missed ticks instead of firing them back to back
+                tick = monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self, interval: float = 1.0):
+        '''
+        Run sampling in background (daemon) thread.
+        '''
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run, args=(interval,), name="pyjboss-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''
+        Stop background sampling started with start().
+        '''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __getitem__(self, key: tuple) -> RingBuffer:
+        return self.buffers[self._key(*key)]
+
+    def delta(self, address: Union[Addresses, str], attribute: str, samples: int = 1) -> float:
+        return self[address, attribute].delta(samples)
+
+    def rate(self, address: Union[Addresses, str], attribute: str, samples: int = 1) -> float:
+        return self[address, attribute].rate(samples)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __repr__(self):
+        return "Sampler(metrics=%s,running=%s)" % (len(self.buffers), self._thread is not None)
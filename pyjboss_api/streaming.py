@@ -0,0 +1,375 @@
+'''
+Streaming (incremental) parsing of large WildFly API responses.
+
+Response body is parsed while it's being downloaded and only the parts that caller asks for are turned into
+python objects, so neither raw response text nor whole parsed document needs to be held in memory. If `ijson`
+module is installed, it's used for parsing, otherwise pure python parser from this module is used.
+'''
+import re
+from codecs import getincrementaldecoder
+from json import loads as jloads
+from logging import DEBUG
+from time import perf_counter
+from typing import Iterator, Union
+from warnings import warn
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from requests.exceptions import ConnectionError
+
+from .exceptions import CallRaisedException, FailedApiCall, UnsupportedOperation
+from .helpers import Addresses, Payload
+from .instrumentation import CallEvent, run_hooks
+from .logger import log
+
+_TOKEN = re.compile(r'[\s]*(?:([{}\[\],:])|"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))')
+_LITERALS = {"true": True, "false": False, "null": None}
+_DELIMITERS = frozenset(" \t\r\n,:]}")
+
+def _invalid(buf: str, pos: int) -> ValueError:
+    return ValueError("Invalid JSON near: %r" % buf[pos:pos + 40])
+
+def parse_events(chunks: Iterator[bytes]) -> Iterator[tuple]:
+    '''
+    Pure python incremental JSON parser. Takes iterator of byte chunks and yields (event, value) tuples, same as
+    `ijson.basic_parse`: start_map, map_key, end_map, start_array, end_array, string, number, boolean, null.
+    Raises ValueError on malformed or truncated document.
+    '''
+    decoder = getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+    # Stack of containers, True for map and False for array
+    stack = []
+    # What may come next: value, value_or_end (after '['), key, key_or_end (after '{'), colon, comma_or_end or done
+    state = "value"
+
+    while True:
+        match = _TOKEN.match(buf, pos)
+        # Token might be incomplete (strings) or continue in next chunk (numbers, literals), so read more
+        if not eof and (match is None or match.end() == len(buf) or (match.group(1) is None and match.group(2) is None and buf[match.end()] not in _DELIMITERS)):
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                buf = buf[pos:] + decoder.decode(b"", final=True)
+                eof = True
+            else:
+                buf = buf[pos:] + decoder.decode(chunk)
+            pos = 0
+            continue
+        if match is None:
+            if buf[pos:].strip():
+                raise _invalid(buf, pos)
+            if state != "done":
+                raise ValueError("Unexpected end of JSON")
+            return
+        if state == "done":
+            raise _invalid(buf, pos)
+
+        start, pos = pos, match.end()
+        symbol, string, number, literal = match.groups()
+        if symbol in ("}", "]"):
+            is_map = symbol == "}"
+            if not stack or stack[-1] != is_map or state not in ("comma_or_end", "key_or_end" if is_map else "value_or_end"):
+                raise _invalid(buf, start)
+            stack.pop()
+            state = "comma_or_end" if stack else "done"
+            yield ("end_map" if is_map else "end_array", None)
+        elif symbol == ",":
+            if state != "comma_or_end":
+                raise _invalid(buf, start)
+            state = "key" if stack[-1] else "value"
+        elif symbol == ":":
+            if state != "colon":
+                raise _invalid(buf, start)
+            state = "value"
+        elif state in ("key", "key_or_end"):
+            if string is None:
+                raise _invalid(buf, start)
+            state = "colon"
+            yield ("map_key", jloads('"%s"' % string) if "\\" in string else string)
+        elif state not in ("value", "value_or_end"):
+            raise _invalid(buf, start)
+        elif symbol == "{":
+            stack.append(True)
+            state = "key_or_end"
+            yield ("start_map", None)
+        elif symbol == "[":
+            stack.append(False)
+            state = "value_or_end"
+            yield ("start_array", None)
+        else:
+            state = "comma_or_end" if stack else "done"
+            if string is not None:
+                yield ("string", jloads('"%s"' % string) if "\\" in string else string)
+            elif number is not None:
+                yield ("number", float(number) if ("." in number or "e" in number or "E" in number) else int(number))
+            else:
+                value = _LITERALS[literal]
+                yield ("null" if value is None else "boolean", value)
+
+def _events(chunks: Iterator[bytes]) -> Iterator[tuple]:
+    if ijson is not None:
+        return ijson.basic_parse(_ChunkReader(chunks), use_float=True)
+    return parse_events(chunks)
+
+class _ChunkReader(object):
+    '''
+    File-like wrapper over iterator of byte chunks, needed by ijson.
+    '''
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = iter(chunks)
+        self._buf = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buf) < size:
+            try:
+                self._buf += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buf = self._buf, b""
+        else:
+            data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+def _next(events: Iterator[tuple]) -> tuple:
+    try:
+        return next(events)
+    except StopIteration:
+        raise ValueError("Unexpected end of JSON") from None
+
+def build_value(event: str, value, events: Iterator[tuple]):
+    '''
+    Build python object starting with given event, consuming as many events as needed.
+    '''
+    if event == "start_map":
+        result = {}
+        for event, value in events:
+            if event == "end_map":
+                return result
+            key = value
+            result[key] = build_value(*_next(events), events)
+        raise ValueError("Unexpected end of JSON")
+    elif event == "start_array":
+        result = []
+        for event, value in events:
+            if event == "end_array":
+                return result
+            result.append(build_value(event, value, events))
+        raise ValueError("Unexpected end of JSON")
+    return value
+
+def skip_value(event: str, events: Iterator[tuple]):
+    '''
+    Consume events of value starting with given event without building it.
+    '''
+    if event in ("start_map", "start_array"):
+        depth = 1
+        for event, _ in events:
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if not depth:
+                    return
+        raise ValueError("Unexpected end of JSON")
+
+def address_path(address: Union[Addresses, str, list, tuple]) -> tuple:
+    '''
+    Turn management address into path of keys within result of recursive read-resource on root path,
+    e.g. '/subsystem=datasources/data-source=ExampleDS' -> ('subsystem', 'datasources', 'data-source', 'ExampleDS').
+    Lists and tuples are treated as paths already, and strings not starting with '/' as single key.
+    '''
+    if isinstance(address, str) and not address.startswith("/"):
+        return (address,)
+    return Addresses.key(address)
+
+class StreamingCall(object):
+    def __init__(self, client, payload: Union[dict, Payload], chunk_size: int = 65536):
+        '''
+        Send payload and parse response incrementally, as it's being downloaded. Response can be consumed only once,
+        with one of `items()`, `extract()` or `value()`. Attributes `success`, `result` (for failed calls) and
+        `reload_required` are populated once response is consumed. Post-call hooks run once response is consumed
+        as well, and `parse` time of their event covers both download and parsing of the body.
+
+            >>> res = StreamingCall(jboss, Payload([], "read-resource", recursive=True))
+            >>> for name, deployment in res.items('deployment'):
+            ...     print(name, deployment['enabled'])
+
+        :param client (required): Instance of JbossConnection
+        :param payload (required): Instance of Payload or dict
+        :param chunk_size (optional, 65536): Size of chunks in which response is read from the network
+        '''
+        self.client = client
+        _payload = payload.to_dict() if isinstance(payload, Payload) else payload
+        self.payload = client.codec.dumps(_payload)
+        self.chunk_size = chunk_size
+        self.success = None
+        self.result = None
+        self.reload_required = False
+        self.rolled_back = False
+        self.exception = None
+        self._consumed = False
+        self.request = None
+        self._posted = None
+        self._response_bytes = 0
+
+        client.last_payload = self.payload
+        debug = log.isEnabledFor(DEBUG)
+        self._event = CallEvent(_payload, len(self.payload)) if client.pre_call_hooks or client.post_call_hooks else None
+        if self._event is not None:
+            run_hooks(client.pre_call_hooks, self._event)
+        try:
+            if debug:
+                log.debug(f"Running streaming call with payload: {self.payload}")
+            self.request = client.session.post(client.address, data=self.payload.encode(), timeout=client.timeout, stream=True)
+            self._posted = perf_counter()
+            if debug:
+                log.debug(f"Call completed with status code: {self.request.status_code}")
+        except ConnectionError as e:
+            log.exception(e)
+            self.exception = type(e).__name__
+            self.success = False
+            self.result = "Cannot connect to host url %s." % (client.address)
+            warn(self.result, CallRaisedException)
+        except Exception as e:
+            log.exception(e)
+            self.exception = type(e).__name__
+            self.success = False
+            self.result = "Exception (%s) occurred. Error: %s" % (type(e).__name__, str(e))
+            warn(self.result, CallRaisedException)
+        if self.request is None:
+            self._done()
+
+    def _chunks(self) -> Iterator[bytes]:
+        for chunk in self.request.iter_content(self.chunk_size):
+            self._response_bytes += len(chunk)
+            yield chunk
+
+    def _done(self):
+        if self._event is not None:
+            self._event._complete(self, self._posted, perf_counter() if self._posted is not None else None, self._response_bytes)
+            run_hooks(self.client.post_call_hooks, self._event)
+            self._event = None
+
+    def _top_level(self) -> Iterator[tuple]:
+        '''
+        Walk top level of response and yield ('result', events) when result value starts, handling the rest
+        (outcome, failure-description, response-headers) internally.
+        '''
+        if self._consumed:
+            raise UnsupportedOperation("consume (streamed response was already consumed)")
+        self._consumed = True
+        if self.request is None:
+            return
+
+        events = _events(self._chunks())
+        try:
+            event, _ = _next(events)
+            if event != "start_map":
+                raise ValueError("Expected JSON object in response")
+            for event, key in events:
+                if event == "end_map":
+                    break
+                event, value = _next(events)
+                if key == "result":
+                    yield event, value, events
+                elif key == "outcome":
+                    self.success = value == "success"
+                elif key == "rolled-back":
+                    self.rolled_back = bool(value)
+                elif key in ("failure-description", "response-headers"):
+                    value = build_value(event, value, events)
+                    if key == "failure-description":
+                        self.result = value
+                    elif value.get("process-state") == "reload-required":
+                        self.reload_required = True
+                        self.client.reload_required = True
+                else:
+                    skip_value(event, events)
+        except Exception as e:
+            log.exception(e)
+            self.exception = type(e).__name__
+            self.success = False
+            self.result = "Failed to parse response. Status code: %s, error: %s" % (self.request.status_code, e)
+            warn(self.result, CallRaisedException)
+        finally:
+            self.request.close()
+            self._done()
+
+    def items(self, path: Union[Addresses, str, list, tuple] = ()) -> Iterator[tuple]:
+        '''
+        Yield (key, value) pairs of object found under path within result, one by one. Only one value is held in memory at a time.
+
+        :param path (optional): Address ('/subsystem=logging'), single key ('deployment') or list of keys within result
+        '''
+        path = address_path(path)
+        for event, value, events in self._top_level():
+            yield from self._walk_items(event, events, path)
+
+    def _walk_items(self, event: str, events: Iterator[tuple], path: tuple):
+        if event != "start_map":
+            skip_value(event, events)
+            return
+        for event, key in events:
+            if event == "end_map":
+                return
+            event, value = _next(events)
+            if not path:
+                yield key, build_value(event, value, events)
+            elif key == path[0]:
+                yield from self._walk_items(event, events, path[1:])
+            else:
+                skip_value(event, events)
+
+    def extract(self, *paths: Union[Addresses, str, list, tuple]) -> dict:
+        '''
+        Extract only values under given paths within result, skipping everything else. Returns dict with passed
+        paths as keys; paths missing from response are missing from returned dict as well.
+
+            >>> res = StreamingCall(jboss, Payload([], "read-resource", recursive=True))
+            >>> res.extract('/subsystem=datasources/data-source=ExampleDS', '/subsystem=logging/root-logger=ROOT')
+
+        :param paths (required): Addresses (like '/subsystem=logging') or lists of keys within result
+        '''
+        wanted = { address_path(path): path for path in paths }
+        found = {}
+        for event, value, events in self._top_level():
+            self._walk_extract(event, value, events, (), wanted, found)
+        return found
+
+    def _walk_extract(self, event: str, value, events: Iterator[tuple], current: tuple, wanted: dict, found: dict):
+        if current in wanted:
+            found[wanted[current]] = build_value(event, value, events)
+            return
+        if event != "start_map" or not any( path[:len(current)] == current for path in wanted ):
+            skip_value(event, events)
+            return
+        for event, key in events:
+            if event == "end_map":
+                return
+            event, value = _next(events)
+            self._walk_extract(event, value, events, current + (key,), wanted, found)
+
+    def value(self):
+        '''
+        Build and return whole result. Still avoids holding raw response text in memory next to parsed result.
+        '''
+        result = None
+        for event, value, events in self._top_level():
+            result = build_value(event, value, events)
+        if self.success:
+            self.result = result
+        return self.result
+
+    def raise_for_status(self):
+        if not self.success:
+            raise FailedApiCall(self)
+
+    def __repr__(self):
+        return "JbossStreamingResult(success=%s,consumed=%s,reload_required=%s)" % (self.success, self._consumed, self.reload_required)
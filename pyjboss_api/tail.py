@@ -0,0 +1,191 @@
+'''
+Incremental tailing of server log files through logging subsystem's `read-log-file` operation.
+
+WildFly can only return lines counted from the end (or start) of the file, it doesn't expose any position that
+could be used to continue where previous read stopped. Position is tracked by remembering last few lines that were
+returned (anchor) and looking them up in newly read lines. Size of the file (`file-size` attribute) tells how much
+it grew since last poll, which is used to estimate how many lines to ask for, and to detect rotation.
+'''
+from math import ceil
+from threading import Event
+from typing import Iterator, Optional, Union
+
+from .core import Call, JbossConnection
+from .helpers import Addresses, Payload
+from .logger import log
+from .operations import READ_ATTRIBUTE, READ_LOG_FILE
+
+class _LogFile(object):
+    __slots__ = ('name', 'address', 'size', 'anchor', 'line_size', 'buffer', 'requested', 'expected')
+
+    def __init__(self, name: str, address: str):
+        self.name = name
+        self.address = address
+        # None until first poll
+        self.size = None
+        self.anchor = []
+        # Average size of line in bytes, used to turn growth of file into number of lines
+        self.line_size = 120.0
+        self.buffer = []
+        self.requested = 0
+        # Estimated number of new lines
+        self.expected = 0
+
+class LogTail(object):
+    def __init__(self, connection: JbossConnection, files: Union[str, list] = "server.log", initial_lines: int = 10,
+                 max_lines: int = 10000, anchor_lines: int = 3, logging_address: Union[Addresses, str] = "/subsystem=logging"):
+        '''
+        Follow one or more log files, returning only lines that were added since previous poll. Every poll costs
+        one composite call reading sizes of all files, and one more reading lines only of files that grew.
+
+            >>> from pyjboss_api.tail import LogTail
+            >>> for name, line in LogTail(jboss, ["server.log", "audit.log"]).follow(interval=2.0):
+            ...     print(name, line)
+
+        :param connection (required): Instance of JbossConnection (model doesn't have to be loaded)
+        :param files (optional, 'server.log'): Name of log file or list of names (children of `log-file` resource)
+        :param initial_lines (optional, 10): Number of existing lines returned by first poll
+        :param max_lines (optional, 10000): Maximum number of lines read per file in single poll; if file grew more
+            than that, older lines are skipped
+        :param anchor_lines (optional, 3): Number of last lines used to find where previous poll stopped
+        :param logging_address (optional, '/subsystem=logging'): Address of logging subsystem
+        '''
+        assert isinstance(anchor_lines, int) and anchor_lines > 0
+        if isinstance(files, str):
+            files = [files]
+        if isinstance(logging_address, Addresses):
+            logging_address = logging_address.str_address
+        self.connection = connection
+        self.initial_lines = initial_lines
+        self.max_lines = max_lines
+        self.anchor_lines = anchor_lines
+        self.files = [ _LogFile(name, f"{logging_address.rstrip('/')}/log-file={name}") for name in files ]
+        self.errors = 0
+        self.gaps = 0
+        self.lines_read = 0
+        self.lines_returned = 0
+        self._stop = Event()
+
+    def _composite(self, steps: list) -> list:
+        payload = Payload(operation="composite", steps=steps)
+        payload.add_key_value("operation-headers", {"rollback-on-runtime-failure": False})
+        res = Call(self.connection, payload.to_dict())
+        results = res.result if isinstance(res.result, dict) else {}
+        if not res.success:
+            log.debug(f"Reading log files failed: {res.result}")
+
+        values = []
+        for i in range(1, len(steps) + 1):
+            step = results.get(f"step-{i}") or {}
+            if "result" in step and "failure-description" not in step:
+                values.append(step["result"])
+            else:
+                self.errors += 1
+                values.append(None)
+        return values
+
+    def _find_anchor(self, log_file: _LogFile) -> Optional[int]:
+        # Same lines can appear more than once, so pick occurrence closest to where growth of file says it should be
+        anchor, buffer = log_file.anchor, log_file.buffer
+        target = len(buffer) - log_file.expected - len(anchor)
+        found = None
+        for i in range(len(buffer) - len(anchor), -1, -1):
+            if buffer[i] == anchor[0] and buffer[i:i + len(anchor)] == anchor:
+                if found is not None and abs(i - target) >= abs(found - target):
+                    break
+                found = i
+        return found
+
+    def _feed(self, log_file: _LogFile, lines: list) -> Optional[list]:
+        '''
+        Add lines read from file (newest page first, older pages after it) and return new lines once position
+        of previous poll is found, or None if more lines need to be read.
+        '''
+        log_file.buffer = lines + log_file.buffer
+        self.lines_read += len(lines)
+        buffer = log_file.buffer
+
+        if log_file.size is None:
+            return buffer[-self.initial_lines:] if self.initial_lines else []
+        if log_file.anchor:
+            i = self._find_anchor(log_file)
+            if i is not None:
+                return buffer[i + len(log_file.anchor):]
+        # Start of file was reached, so file was replaced and all of it is new
+        if len(lines) < log_file.requested:
+            return buffer
+        if len(buffer) >= self.max_lines:
+            self.gaps += 1
+            log.debug(f"Log file {log_file.name} grew by more than {self.max_lines} lines, older lines are skipped")
+            return buffer
+        return None
+
+    def poll(self) -> list:
+        '''
+        Read lines added to log files since previous poll. Returns list of (file, line) tuples, oldest line first.
+        '''
+        sizes = self._composite([ Payload(f.address, **READ_ATTRIBUTE("file-size")).to_dict() for f in self.files ])
+
+        pending = []
+        for log_file, size in zip(self.files, sizes):
+            if size is None:
+                continue
+            if log_file.size is None:
+                log_file.requested = max(self.initial_lines, self.anchor_lines)
+            elif size == log_file.size:
+                continue
+            else:
+                if size < log_file.size:
+                    log.debug(f"Log file {log_file.name} was rotated")
+                    log_file.anchor = []
+                growth = size if size < log_file.size else size - log_file.size
+                log_file.expected = ceil(growth / log_file.line_size)
+                # Ask for a bit more than estimate, so anchor is most likely in first page
+                log_file.requested = min(self.max_lines, int(log_file.expected * 1.25) + len(log_file.anchor) + 2)
+            log_file.buffer = []
+            pending.append((log_file, size))
+
+        new = []
+        while pending:
+            pages = self._composite([ Payload(f.address, **READ_LOG_FILE(f.requested, len(f.buffer))).to_dict() for f, _ in pending ])
+            next_pending = []
+            for (log_file, size), lines in zip(pending, pages):
+                if lines is None:
+                    log_file.buffer = []
+                    continue
+                added = self._feed(log_file, lines)
+                if added is None:
+                    log_file.requested = min(self.max_lines - len(log_file.buffer), log_file.requested * 2)
+                    next_pending.append((log_file, size))
+                    continue
+
+                if log_file.size is not None and added and size > log_file.size:
+                    log_file.line_size = (log_file.line_size + (size - log_file.size) / len(added)) / 2
+                log_file.anchor = (log_file.anchor + added)[-self.anchor_lines:] if log_file.size is not None else log_file.buffer[-self.anchor_lines:]
+                log_file.size = size
+                log_file.buffer = []
+                new.extend( (log_file.name, line) for line in added )
+            pending = next_pending
+
+        self.lines_returned += len(new)
+        return new
+
+    def follow(self, interval: float = 1.0) -> Iterator[tuple]:
+        '''
+        Poll every `interval` seconds and yield (file, line) tuples until stop() is called.
+
+        :param interval (optional, 1.0): Seconds between polls
+        '''
+        self._stop.clear()
+        while not self._stop.is_set():
+            yield from self.poll()
+            self._stop.wait(interval)
+
+    def stop(self):
+        '''
+        Stop follow() loop, e.g. from another thread.
+        '''
+        self._stop.set()
+
+    def __repr__(self):
+        return "LogTail(files=%s,lines_read=%s,lines_returned=%s)" % ([ f.name for f in self.files ], self.lines_read, self.lines_returned)
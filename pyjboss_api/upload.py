@@ -0,0 +1,91 @@
+'''
+Streaming multipart/form-data body used to upload deployments to `/management-upload`.
+'''
+import os
+from json import dumps as jdumps
+from typing import Callable, Iterator, Optional
+from uuid import uuid4
+
+class MultipartBody(object):
+    def __init__(self, path: str, operation: dict, chunk_size: int = 1048576, progress: Optional[Callable] = None):
+        '''
+        Request body made of file part (streamed from disk) and operation part, as expected by WildFly's
+        `/management-upload` endpoint. File is never read into memory as a whole - body is sent in chunks of
+        `chunk_size` bytes while it's being read. Size of body is known upfront, so it's sent with Content-Length,
+        and body can be rewound with seek(), which is needed when digest authentication challenge is repeated.
+
+        :param path (required): Path to file (WAR, EAR, JAR ...) to upload
+        :param operation (required): Operation (dict) referencing uploaded file with {"input-stream-index": 0}
+        :param chunk_size (optional, 1048576): Size of chunks in which file is read and sent
+        :param progress (optional): Function called with (bytes_sent, bytes_total) after every chunk
+        '''
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = uuid4().hex
+        self.file_size = os.path.getsize(path)
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        filename = os.path.basename(path).replace('"', '')
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        self._tail = (
+            f'\r\n--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="operation"\r\n'
+            f'Content-Type: application/json\r\n\r\n'
+            f'{jdumps(operation)}\r\n'
+            f'--{self.boundary}--\r\n'
+        ).encode()
+        self._size = len(self._head) + self.file_size + len(self._tail)
+        self._pos = 0
+        self._file = None
+
+    def __len__(self):
+        return self._size
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def _read(self, size: int) -> bytes:
+        # Body is head + file + tail, read from whichever part current position falls into
+        file_start = len(self._head)
+        file_end = file_start + self.file_size
+        if self._pos < file_start:
+            data = self._head[self._pos:file_start]
+        elif self._pos < file_end:
+            if self._file is None:
+                self._file = open(self.path, "rb")
+            self._file.seek(self._pos - file_start)
+            data = self._file.read(min(size, file_end - self._pos))
+            if not data:
+                raise IOError(f"File {self.path} was truncated while being uploaded")
+        else:
+            data = self._tail[self._pos - file_end:]
+        self._pos += len(data)
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        while self._pos < self._size:
+            data = self._read(self.chunk_size)
+            if self.progress is not None:
+                self.progress(self._pos, self._size)
+            yield data
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __repr__(self):
+        return "MultipartBody(path=%s,size=%s,position=%s)" % (self.path, self._size, self._pos)
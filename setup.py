@@ -27,5 +27,10 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     install_requires = ['requests', 'jmespath'],
+    extras_require = {
+        'async': ['httpx'],
+        'streaming': ['ijson'],
+        'fast': ['orjson'],
+    },
     python_requires='>=3.6',
 )
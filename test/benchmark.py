@@ -0,0 +1,256 @@
+'''
+Benchmarks of pyjboss_api against local mock WildFly management server (test/mock_server.py).
+
+For every model size (number of deployments and datasources) it measures:
+    startup      - time to create JbossConnection (server state, description, initial values)
+    memory       - peak memory allocated while connecting, and memory used by fully materialized deployment nodes
+    walk         - time to materialize all deployments, and to look all of them up by path afterwards
+    latency      - latency of single read-attribute calls (median, p95, p99)
+    batch        - throughput of operations sent as one composite call
+    codecs       - decoding and encoding of large description and recursive read-resource with each installed JSON codec
+    compression  - size on the wire and duration of recursive read-resource with and without compressed responses
+
+Mock server runs in separate process, so it's not part of measured memory. Results are printed and written as JSON,
+and can be compared with results of previous run to catch regressions:
+
+    python3 test/benchmark.py --sizes 10,100,1000,10000 --output benchmark.json
+    python3 test/benchmark.py --sizes 10,1000 --compare benchmark.json --threshold 0.25
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tracemalloc
+import warnings
+from time import perf_counter, strftime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyjboss_api.codec import CODECS
+from pyjboss_api.core import Call, JbossConnection
+from pyjboss_api.helpers import Payload
+from pyjboss_api.operations import READ_ATTRIBUTE, READ_RESOURCE
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py")
+USERNAME = "management"
+PASSWORD = "ManagementUserPassword"
+
+# Metrics where bigger number is better, everything else is better when smaller
+HIGHER_IS_BETTER = ("batch_ops_per_second",)
+
+# Values describing the run rather than measuring it
+NOT_COMPARED = ("deployment_nodes", "batch_steps", "description_bytes", "values_bytes")
+
+class MockProcess(object):
+    def __init__(self, port: int, size: int, latency: float):
+        self.port = port
+        self.process = subprocess.Popen(
+            [sys.executable, MOCK_SERVER, "--port", str(port), "--deployments", str(size), "--datasources", str(size), "--latency", str(latency)],
+            stdout=subprocess.PIPE,
+        )
+        # Server prints single line once it's listening
+        self.process.stdout.readline()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def connect(port: int) -> JbossConnection:
+    return JbossConnection(USERNAME, PASSWORD, port=port)
+
+def bench_startup(port: int, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        connect(port).close()
+        times.append(perf_counter() - start)
+    return {"startup_seconds": min(times), "startup_seconds_median": statistics.median(times)}
+
+def bench_memory(port: int) -> dict:
+    tracemalloc.start()
+    jboss = connect(port)
+    _, peak = tracemalloc.get_traced_memory()
+
+    # Drop references to raw responses, so only model is measured
+    jboss.last_call = None
+    jboss.last_payload = None
+    before = tracemalloc.get_traced_memory()[0]
+    deployments = jboss.root.deployment
+    nodes = [ deployments[name] for name in deployments ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    usage = jboss.memory_usage()
+    jboss.close()
+    return {
+        "connect_peak_bytes": peak,
+        "deployment_nodes": len(nodes),
+        "deployment_bytes_per_node": (after - before) // len(nodes) if nodes else 0,
+        "model_bytes_per_node": usage["bytes_per_node"],
+    }
+
+def bench_walk(jboss: JbossConnection) -> dict:
+    start = perf_counter()
+    deployments = jboss.root.deployment
+    names = list(deployments)
+    for name in names:
+        deployments[name]
+    walk = perf_counter() - start
+
+    paths = [ f"/deployment={name}" for name in names ]
+    for path in paths:
+        jboss.get(path)
+    start = perf_counter()
+    for path in paths:
+        jboss.get(path)
+    lookup = perf_counter() - start
+    return {"walk_seconds": walk, "lookup_seconds_per_path": lookup / len(paths) if paths else 0.0}
+
+def bench_latency(jboss: JbossConnection, calls: int) -> dict:
+    payload = Payload("/subsystem=datasources/data-source=ExampleDS", **READ_ATTRIBUTE("enabled"))
+    times = []
+    for _ in range(calls):
+        start = perf_counter()
+        Call(jboss, payload).raise_for_status()
+        times.append(perf_counter() - start)
+    return {
+        "call_latency_median": statistics.median(times),
+        "call_latency_p95": percentile(times, 95),
+        "call_latency_p99": percentile(times, 99),
+    }
+
+def bench_batch(jboss: JbossConnection, steps: int) -> dict:
+    deployments = jboss.root.deployment
+    names = list(deployments)[:steps]
+    start = perf_counter()
+    with jboss.batch() as batch:
+        for name in names:
+            deployments[name].operations.deploy()
+    elapsed = perf_counter() - start
+    batch.raise_for_status()
+    return {"batch_steps": len(names), "batch_seconds": elapsed, "batch_ops_per_second": len(names) / elapsed if elapsed else 0.0}
+
+def bench_codecs(jboss: JbossConnection, repeat: int) -> dict:
+    description = Call(jboss, Payload(operation="read-resource-description", recursive=True, operations=True)).request.content
+    values = Call(jboss, Payload([], READ_RESOURCE, recursive=True)).request.content
+    result = {"description_bytes": len(description), "values_bytes": len(values)}
+    for name, codec in CODECS.items():
+        codec = codec()
+        for kind, data in (("description", description), ("values", values)):
+            loads, dumps = [], []
+            for _ in range(repeat):
+                start = perf_counter()
+                obj = codec.loads(data)
+                loads.append(perf_counter() - start)
+                start = perf_counter()
+                codec.dumps(obj)
+                dumps.append(perf_counter() - start)
+            result[f"codec_{name}_{kind}_loads_seconds"] = min(loads)
+            result[f"codec_{name}_{kind}_dumps_seconds"] = min(dumps)
+    return result
+
+def bench_compression(port: int, repeat: int) -> dict:
+    result = {}
+    payload = Payload([], READ_RESOURCE, recursive=True)
+    for compression in (True, False):
+        jboss = JbossConnection(USERNAME, PASSWORD, port=port, load_model=False, compression=compression)
+        times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            res = Call(jboss, payload)
+            times.append(perf_counter() - start)
+        kind = "compressed" if compression else "identity"
+        result[f"read_{kind}_wire_bytes"] = int(res.request.headers.get("Content-Length", len(res.request.content)))
+        result[f"read_{kind}_seconds"] = min(times)
+        jboss.close()
+    return result
+
+def run(sizes: list, port: int, latency: float, repeat: int, calls: int, batch_steps: int) -> dict:
+    results = {}
+    for size in sizes:
+        print(f"Benchmarking model with {size} deployments and {size} datasources")
+        with MockProcess(port, size, latency):
+            result = {}
+            result.update(bench_startup(port, repeat))
+            result.update(bench_memory(port))
+            jboss = connect(port)
+            result.update(bench_walk(jboss))
+            result.update(bench_latency(jboss, calls))
+            result.update(bench_batch(jboss, batch_steps))
+            result.update(bench_codecs(jboss, repeat))
+            jboss.close()
+            result.update(bench_compression(port, repeat))
+        for name, value in result.items():
+            print(f"  {name:<30} {value:.6g}" if isinstance(value, float) else f"  {name:<30} {value}")
+        results[str(size)] = result
+    return results
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    '''
+    Return list of regressions - metrics that got worse by more than threshold (relative).
+    '''
+    regressions = []
+    for size, metrics in current["results"].items():
+        old = baseline.get("results", {}).get(size)
+        if not old:
+            continue
+        for name, value in metrics.items():
+            if name in NOT_COMPARED or name not in old or not old[name]:
+                continue
+            change = (value - old[name]) / old[name]
+            if name in HIGHER_IS_BETTER:
+                change = -change
+            marker = ""
+            if change > threshold:
+                marker = "  <-- REGRESSION"
+                regressions.append((size, name, old[name], value))
+            print(f"  [{size}] {name:<30} {old[name]:.6g} -> {value:.6g} ({change:+.1%}){marker}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pyjboss_api against mock WildFly management server")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma separated numbers of deployments and datasources")
+    parser.add_argument("--port", type=int, default=9557)
+    parser.add_argument("--latency", type=float, default=0, help="Artificial server latency per operation in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of connections made to measure startup")
+    parser.add_argument("--calls", type=int, default=200, help="Number of calls made to measure latency")
+    parser.add_argument("--batch-steps", type=int, default=1000, help="Maximum number of steps in batch")
+    parser.add_argument("--output", default="benchmark.json", help="File to write results to")
+    parser.add_argument("--compare", help="Results of previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change considered as regression when comparing")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+
+    report = {
+        "time": strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": args.latency,
+        "results": run([ int(size) for size in args.sizes.split(",") ], args.port, args.latency, args.repeat, args.calls, args.batch_steps),
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        print(f"Comparing with {args.compare}")
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+'''
+Checks of batch, apply, query, refresh, log tail, streaming, deployment upload, scope, caches, asyncio connection, fleet
+and managed domain against local mock WildFly management server (test/mock_server.py), so they can be run without Wildfly:
+
+    python3 test/mock_checks.py
+'''
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockServer
+from pyjboss_api import streaming
+from pyjboss_api.aio import AsyncJbossConnection
+from pyjboss_api.core import Call, JbossConnection
+from pyjboss_api.domain import Domain
+from pyjboss_api.exceptions import UnsupportedOperation
+from pyjboss_api.fleet import Fleet
+from pyjboss_api.helpers import Payload
+from pyjboss_api.logger import log
+from pyjboss_api.operations import READ_ATTRIBUTE, READ_RESOURCE, WRITE_ATTRIBUTE
+from pyjboss_api.streaming import StreamingCall
+from pyjboss_api.tail import LogTail
+
+# Mock server is plain HTTP
+warnings.simplefilter("ignore")
+
+with MockServer(deployments=3, datasources=3) as server:
+    print("Establishing jboss connection")
+    jboss = JbossConnection(server.username, server.password, port=server.port)
+    operations = []
+    jboss.add_call_hook(post=lambda event: operations.append(event.operation))
+    datasources = jboss.root.subsystem.datasources.data_source
+
+    print("Checking batch of add() operations on path ['subsystem']['datasources']['data-source']")
+    with jboss.batch() as batch:
+        res_add = datasources.add('BatchDS', jndi_name='java:/BatchDS')
+        res_add_two = datasources.add('BatchDSTwo', jndi_name='java:/BatchDSTwo')
+    batch.raise_for_status()
+    res_add.raise_for_status()
+    assert 'BatchDS' in server.model.values['subsystem']['datasources']['data-source']
+
+    print("Checking that nested batch joins outer one and conflicting rollback flag is refused")
+    with jboss.batch() as batch:
+        with jboss.batch() as inner:
+            assert inner is batch
+            datasources.BatchDSTwo.operations.remove()
+        try:
+            jboss.batch(rollback_on_failure=False)
+            raise AssertionError("Nested batch with different rollback_on_failure was accepted")
+        except ValueError:
+            pass
+    batch.raise_for_status()
+    assert 'BatchDSTwo' not in server.model.values['subsystem']['datasources']['data-source']
+
+    print("Checking that batch sent without 'with' block doesn't keep connection in batch mode")
+    batch = jboss.batch()
+    step = batch.add(Payload('/subsystem=datasources/data-source=ExampleDS', **READ_ATTRIBUTE('jndi-name')))
+    batch.send()
+    assert step.result == 'java:jboss/datasources/ExampleDS', step.result
+    res = datasources.ExampleDS.operations.read_attribute(name='enabled')
+    res.raise_for_status()
+    assert res.result is True
+    try:
+        with batch:
+            pass
+        raise AssertionError("Batch that was already sent was reused")
+    except UnsupportedOperation:
+        pass
+
+    print("Checking apply() sends only differences and nothing when there are none")
+    desired = {'/subsystem=datasources/data-source=ExampleDS': {'min-pool-size': 5}}
+    changes = jboss.apply(desired)
+    changes.raise_for_status()
+    assert len(changes) == 1 and server.model.values['subsystem']['datasources']['data-source']['ExampleDS']['min-pool-size'] == 5
+    changes = jboss.apply(desired)
+    assert len(changes) == 0 and changes.call is None
+
+    print("Checking apply(fresh=False) uses values read on connect, but not after direct write")
+    operations.clear()
+    changes = jboss.apply({'/subsystem=datasources/data-source=DS1': {'min-pool-size': 1}}, fresh=False)
+    assert len(changes) == 0 and operations == [], operations
+    datasources.ExampleDS.attributes['min-pool-size'] = 9
+    changes = jboss.apply(desired, fresh=False)
+    changes.raise_for_status()
+    assert len(changes) == 1, changes.plan()
+    assert server.model.values['subsystem']['datasources']['data-source']['ExampleDS']['min-pool-size'] == 5
+    changes = jboss.apply(desired, fresh=False)
+    assert len(changes) == 0, changes.plan()
+
+    print("Checking query() filters and projects resources locally")
+    operations.clear()
+    res = jboss.query('/subsystem=logging/logger=*', select='level')
+    assert res.result == {'/subsystem=logging/logger=com.arjuna': 'WARN'} and operations == [], operations
+    # Datasources were written above, so they are read again
+    res = jboss.query('/subsystem=datasources/data-source=*', where='"min-pool-size" < `5`', select='"jndi-name"')
+    assert res.success and operations == ['read-resource'], operations
+    assert res.result == {'/subsystem=datasources/data-source=DS1': 'java:jboss/datasources/DS1', '/subsystem=datasources/data-source=DS2': 'java:jboss/datasources/DS2'}, res.result
+    res = jboss.query('/deployment', where={'enabled': True}, fresh=True)
+    assert res.addresses() == [ f"/deployment={name}" for name, value in server.model.values['deployment'].items() if value['enabled'] ], res.addresses()
+
+    print("Checking refresh() picks up deployments added and removed outside of connection")
+    assert 'app0.war' in jboss.root.deployment
+    server.model.add([{"deployment": "outside.war"}], {"name": "outside.war", "runtime-name": "outside.war", "enabled": True})
+    server.model.remove([{"deployment": "app0.war"}])
+    changes = jboss.refresh('/deployment')
+    assert changes == {'/deployment': (['outside.war'], ['app0.war'])}, changes
+    assert 'outside.war' in jboss.root.deployment and 'app0.war' not in jboss.root.deployment
+    assert jboss.refresh('/deployment') == {}
+
+    print("Checking LogTail returns only lines added since previous poll")
+    server.model.logs['server.log'].extend(f"line {i}" for i in range(20))
+    tail = LogTail(jboss, initial_lines=5)
+    lines = tail.poll()
+    assert lines == [ ('server.log', f"line {i}") for i in range(15, 20) ], lines
+    assert tail.poll() == []
+    server.model.logs['server.log'].extend(["repeated"] * 4 + ["last"])
+    lines = tail.poll()
+    assert lines == [ ('server.log', line) for line in ["repeated"] * 4 + ["last"] ], lines
+    server.model.logs['server.log'][:] = ["rotated"]
+    assert tail.poll() == [('server.log', 'rotated')]
+
+    print("Checking StreamingCall with pure python parser and tiny chunks matches regular call")
+    streaming.ijson = None
+    expected = Call(jboss, Payload([], READ_RESOURCE, recursive=True)).result
+    res = StreamingCall(jboss, Payload([], READ_RESOURCE, recursive=True), chunk_size=7)
+    assert res.value() == expected and res.success
+    res = StreamingCall(jboss, Payload([], READ_RESOURCE, recursive=True), chunk_size=3)
+    assert dict(res.items('/subsystem=datasources/data-source')) == expected['subsystem']['datasources']['data-source']
+    for malformed in ('{"a":1', '[1 2]', '{"a": 1,}', '{"outcome": "success", "result": [1, 2'):
+        try:
+            events = streaming.parse_events([malformed.encode()])
+            streaming.build_value(*next(events), events)
+            raise AssertionError(f"Malformed JSON was accepted: {malformed}")
+        except ValueError:
+            pass
+
+    print("Checking deploy() streams multi-chunk file and is rewound after authentication challenge on new thread")
+    with tempfile.TemporaryDirectory() as upload_dir:
+        archive = os.path.join(upload_dir, "uploaded.war")
+        content = os.urandom(4096 * 3 + 100)
+        with open(archive, "wb") as f:
+            f.write(content)
+        sent, uploads = [], {}
+        challenges = server.stats["challenges"]
+        # Digest state is kept per thread, so first call from new thread is challenged and body has to be sent again
+        thread = threading.Thread(target=lambda: uploads.update(res=jboss.deploy(archive, chunk_size=4096, progress=lambda done, total: sent.append((done, total)))))
+        thread.start()
+        thread.join()
+        uploads["res"].raise_for_status()
+        assert server.stats["challenges"] > challenges
+        # Body was sent in chunks twice - to challenged request and, rewound, to answered one
+        assert server.uploads[-1] == len(content) and sent[-1][0] == sent[-1][1], sent
+        assert len(sent) > 8 and [ done for done, _ in sent ].count(sent[-1][0]) == 2, sent
+        assert server.model.values['deployment']['uploaded.war']['content'] == [{"hash": {"BYTES_VALUE": hashlib.sha1(content).hexdigest()}}]
+        assert 'uploaded.war' in jboss.root.deployment and jboss.root.deployment['uploaded.war'].attributes['enabled'] is True
+        res = jboss.deploy(archive, chunk_size=4096, replace=True, enabled=False)
+        res.raise_for_status()
+        assert server.model.values['deployment']['uploaded.war']['enabled'] is False
+
+    print("Checking connection with scope loads only listed branches")
+    scoped = JbossConnection(server.username, server.password, port=server.port, scope=['/subsystem=datasources', '/deployment'])
+    assert sorted(scoped.root) == ['deployment', 'subsystem'] and list(scoped.root.subsystem) == ['datasources'], list(scoped.root)
+    assert sorted(scoped.root.subsystem.datasources.data_source) == sorted(server.model.values['subsystem']['datasources']['data-source'])
+    assert scoped.root.deployment['app1.war'].attributes['enabled'] is True
+
+    print("Checking description cache serves description of known server build from disk")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first_ops = server.stats["operations"]
+        cached = JbossConnection(server.username, server.password, port=server.port, cache_dir=cache_dir)
+        second_ops = server.stats["operations"]
+        assert [ name for name in os.listdir(cache_dir) if name.endswith(".json") ], os.listdir(cache_dir)
+        cached_again = JbossConnection(server.username, server.password, port=server.port, cache_dir=cache_dir)
+        # Description isn't downloaded again
+        assert server.stats["operations"] - second_ops == second_ops - first_ops - 1
+        assert cached_again._resource_description == cached._resource_description
+
+    print("Checking read cache serves repeated reads and drops them after write")
+    reads = JbossConnection(server.username, server.password, port=server.port, load_model=False, read_cache_ttl=60)
+    events = []
+    reads.add_call_hook(post=events.append)
+    read = Payload('/subsystem=datasources/data-source=DS1', **READ_ATTRIBUTE('min-pool-size'))
+    assert Call(reads, read).result == 1 and Call(reads, read).result == 1
+    assert [ event.cached for event in events ] == [False, True], events
+    Call(reads, Payload('/subsystem=datasources/data-source=DS1', **WRITE_ATTRIBUTE('min-pool-size', 2))).raise_for_status()
+    assert Call(reads, read).result == 2 and not events[-1].cached
+    assert reads.read_cache.stats()["hits"] == 1
+
+    print("Checking AsyncJbossConnection reads attributes concurrently")
+    async def read_jndi_names():
+        async with AsyncJbossConnection(server.username, server.password, port=server.port) as ajboss:
+            datasources = ajboss.root.subsystem.datasources.data_source
+            names = sorted(datasources)
+            return dict(zip(names, await asyncio.gather(*[ datasources[name].attributes['jndi-name'] for name in names ])))
+    loop = asyncio.new_event_loop()
+    try:
+        jndi_names = loop.run_until_complete(read_jndi_names())
+    finally:
+        loop.close()
+    assert jndi_names == { name: value['jndi-name'] for name, value in server.model.values['subsystem']['datasources']['data-source'].items() }, jndi_names
+
+    print("Checking Fleet runs operation on all hosts and collects failures of unreachable ones")
+    with MockServer(deployments=1, datasources=1) as other:
+        hosts = [f"127.0.0.1:{server.port}", f"127.0.0.1:{other.port}", f"127.0.0.1:{server.port}", "127.0.0.1:1"]
+        with Fleet(hosts, server.username, server.password, timeout=5) as fleet:
+            # Unreachable host logs connection error
+            log.disabled = True
+            try:
+                report = fleet.read_attribute('/subsystem=datasources/data-source=ExampleDS', 'jndi-name')
+            finally:
+                log.disabled = False
+            assert len(report) == 4 and len(report.successes) == 3, report
+            assert [ r.host for r in report.failures ] == ["127.0.0.1:1"], report.failures
+            assert { r.result for r in report.successes } == {'java:jboss/datasources/ExampleDS'}
+            # Host listed twice shares one connection
+            assert fleet.connection(hosts[0]) is fleet.connection(hosts[2])
+
+with MockServer(deployments=2, datasources=2, hosts=2, servers=2) as server:
+    print("Checking Domain lists servers and fans out reads and writes to them")
+    jboss = JbossConnection(server.username, server.password, port=server.port)
+    domain = Domain(jboss)
+    assert domain.is_domain and sorted(domain.hosts()) == sorted(server.model.values['host'])
+    servers = domain.servers()
+    assert len(servers) == 4 and all( s.running for s in servers ), servers
+    res = domain.read('/subsystem=datasources/data-source=ExampleDS', 'enabled')
+    assert res.success and len(res) == 4 and set(res.result.values()) == {True}, res.result
+    res = domain.run('/subsystem=datasources/data-source=ExampleDS', 'write-attribute', name='min-pool-size', value=3, servers=servers[:1])
+    assert res.success and len(res) == 1, res.failures
+    res = domain.read('/subsystem=datasources/data-source=ExampleDS', 'min-pool-size')
+    assert sorted(res.result.values()) == [0, 0, 0, 3], res.result
+    # Proxied hosts and servers are part of the model
+    assert jboss.get(f"/host={servers[0].host}/server={servers[0].name}/subsystem=datasources/data-source=ExampleDS").attributes['min-pool-size'] == 3
+
+print("All checks passed")
@@ -0,0 +1,667 @@
+'''
+Local stand-in for WildFly management interface.
+
+Implements HTTP Digest authentication and enough of the `/management` JSON protocol
+(read-resource, read-attribute, write-attribute, read-resource-description, read-children-names, read-children-resources,
+add, remove, composite, reload, read-log-file and `/management-upload`) to exercise pyjboss_api
+without a real server. Description and value trees are generated synthetically, so their size can be
+tuned to simulate small or very large servers.
+
+Run standalone:
+    python3 test/mock_server.py --port 9990 --deployments 100 --datasources 50
+'''
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+REALM = "ManagementRealm"
+USERNAME = "management"
+PASSWORD = "ManagementUserPassword"
+
+def _attr(_type: str = "STRING", storage: str = "configuration", description: str = ""):
+    return {"type": {"TYPE_MODEL_VALUE": _type}, "description": description, "access-type": "read-write" if storage == "configuration" else "metric", "storage": storage}
+
+def _op(_name: str, _description: str = "", **props):
+    return {"operation-name": _name, "description": _description or _name, "request-properties": {k: {"type": {"TYPE_MODEL_VALUE": v}, "description": k} for k, v in props.items()}, "reply-properties": {}}
+
+def _resource(description: str, attributes: dict = None, children: dict = None, add: bool = False, extra_ops: dict = None):
+    operations = {
+        "read-resource": _op("read-resource", recursive="BOOLEAN", **{"include-runtime": "BOOLEAN", "include-defaults": "BOOLEAN"}),
+        "read-attribute": _op("read-attribute", name="STRING"),
+        "write-attribute": _op("write-attribute", name="STRING", value="STRING"),
+        "read-resource-description": _op("read-resource-description", recursive="BOOLEAN", operations="BOOLEAN"),
+        "read-children-names": _op("read-children-names", **{"child-type": "STRING"}),
+    }
+    if add:
+        operations["add"] = _op("add", "Add new resource")
+        operations["remove"] = _op("remove", "Remove resource")
+    operations.update(extra_ops or {})
+    return {"description": description, "attributes": attributes or {}, "operations": operations, "children": children or {}}
+
+def _child(description: str, model_description: dict):
+    return {"description": description, "model-description": model_description}
+
+def build_description():
+    '''
+    Build resource description tree similar in shape to WildFly standalone server.
+    '''
+    datasource = _resource("A JDBC data-source", {
+        "jndi-name": _attr(),
+        "driver-name": _attr(),
+        "connection-url": _attr(),
+        "enabled": _attr("BOOLEAN"),
+        "min-pool-size": _attr("INT"),
+        "max-pool-size": _attr("INT"),
+    }, {
+        "statistics": _child("Runtime statistics", {
+            "pool": _resource("Pool statistics", {
+                "ActiveCount": _attr("INT", "runtime"),
+                "AvailableCount": _attr("INT", "runtime"),
+                "InUseCount": _attr("INT", "runtime"),
+            }),
+        }),
+    }, add=True)
+    log_file = _resource("Log file", {
+        "file-size": _attr("LONG", "runtime"),
+        "last-modified-time": _attr("LONG", "runtime"),
+        "stream": _attr("STRING", "runtime"),
+    }, extra_ops={"read-log-file": _op("read-log-file", lines="INT", skip="INT", tail="BOOLEAN", encoding="STRING")})
+    file_handler = _resource("Periodic rotating file handler", {
+        "append": _attr("BOOLEAN"),
+        "autoflush": _attr("BOOLEAN"),
+        "enabled": _attr("BOOLEAN"),
+        "file": _attr("OBJECT"),
+        "level": _attr(),
+        "suffix": _attr(),
+    }, add=True)
+    logger = _resource("Logger", {"category": _attr(), "level": _attr(), "use-parent-handlers": _attr("BOOLEAN")}, add=True)
+    deployment = _resource("Deployment", {
+        "name": _attr(),
+        "runtime-name": _attr(),
+        "enabled": _attr("BOOLEAN"),
+        "status": _attr("STRING", "runtime"),
+        "content": _attr("LIST"),
+    }, add=True, extra_ops={"deploy": _op("deploy"), "undeploy": _op("undeploy")})
+    extension = _resource("Extension", {"module": _attr()}, add=True)
+    security_realm = _resource("Security realm", {"map-groups-to-roles": _attr("BOOLEAN")}, {
+        "authentication": _child("Authentication", {
+            "local": _resource("Local authentication", {"allowed-users": _attr(), "default-user": _attr()}, add=True),
+        }),
+    }, add=True)
+
+    return _resource("The root node of the server-level management model.", {
+        "name": _attr(),
+        "launch-type": _attr("STRING", "runtime"),
+        "server-state": _attr("STRING", "runtime"),
+        "product-name": _attr(),
+        "product-version": _attr(),
+        "release-version": _attr(),
+        "management-major-version": _attr("INT"),
+        "management-minor-version": _attr("INT"),
+        "management-micro-version": _attr("INT"),
+    }, {
+        "subsystem": _child("Subsystems", {
+            "datasources": _resource("Datasources subsystem", {}, {"data-source": _child("Data sources", {"*": datasource})}),
+            "logging": _resource("Logging subsystem", {"add-logging-api-dependencies": _attr("BOOLEAN")}, {
+                "periodic-rotating-file-handler": _child("File handlers", {"*": file_handler}),
+                "logger": _child("Loggers", {"*": logger}),
+                "log-file": _child("Log files", {"*": log_file}),
+            }),
+        }),
+        "deployment": _child("Deployments", {"*": deployment}),
+        "extension": _child("Extensions", {"*": extension}),
+        "core-service": _child("Core services", {
+            "management": _resource("Management", {}, {"security-realm": _child("Security realms", {"*": security_realm})}),
+        }),
+    }, extra_ops={"reload": _op("reload"), "shutdown": _op("shutdown"), "composite": _op("composite", steps="LIST")})
+
+def build_values(deployments: int = 10, datasources: int = 10):
+    '''
+    Build values tree (what recursive read-resource would return) with given number of
+    deployments and datasources.
+    '''
+    ds = {}
+    for i in range(datasources):
+        name = "ExampleDS" if i == 0 else f"DS{i}"
+        ds[name] = {
+            "jndi-name": f"java:jboss/datasources/{name}",
+            "driver-name": "h2",
+            "connection-url": f"jdbc:h2:mem:{name.lower()}",
+            "enabled": True,
+            "min-pool-size": i % 10,
+            "max-pool-size": 20,
+            "statistics": {"pool": {"ActiveCount": i, "AvailableCount": 20 - (i % 20), "InUseCount": 0}},
+        }
+    deps = {}
+    for i in range(deployments):
+        name = f"app{i}.war"
+        deps[name] = {"name": name, "runtime-name": name, "enabled": bool(i % 7), "status": "OK" if i % 7 else "STOPPED", "content": [{"hash": {"BYTES_VALUE": "AAAA"}}]}
+
+    return {
+        "name": "mock",
+        "launch-type": "STANDALONE",
+        "server-state": "running",
+        "product-name": "WildFly Full",
+        "product-version": "10.1.0.Final",
+        "release-version": "2.2.0.Final",
+        "management-major-version": 4,
+        "management-minor-version": 2,
+        "management-micro-version": 0,
+        "subsystem": {
+            "datasources": {"data-source": ds},
+            "logging": {
+                "add-logging-api-dependencies": True,
+                "periodic-rotating-file-handler": {"FILE": {"append": True, "autoflush": True, "enabled": True, "file": {"path": "server.log", "relative-to": "jboss.server.log.dir"}, "level": "ALL", "suffix": ".yyyy-MM-dd-HH"}},
+                "logger": {"com.arjuna": {"category": "com.arjuna", "level": "WARN", "use-parent-handlers": True}},
+                "log-file": {"server.log": {"file-size": 0, "last-modified-time": 0, "stream": None}},
+            },
+        },
+        "deployment": deps or None,
+        "extension": {f"org.jboss.as.{e}": {"module": f"org.jboss.as.{e}"} for e in ("logging", "connector", "deployment-scanner")},
+        "core-service": {"management": {"security-realm": {"ManagementRealm": {"map-groups-to-roles": False, "authentication": {"local": {"allowed-users": "*", "default-user": "$local"}}}}}},
+    }
+
+def build_domain_description():
+    '''
+    Build description of domain controller - hosts with server configurations and running servers (each described
+    like standalone server), and server groups.
+    '''
+    server = build_description()
+    server_config = _resource("Server configuration", {
+        "group": _attr(),
+        "auto-start": _attr("BOOLEAN"),
+        "status": _attr("STRING", "runtime"),
+    }, add=True, extra_ops={"start": _op("start"), "stop": _op("stop")})
+    host = _resource("Host controller", {"name": _attr(), "master": _attr("BOOLEAN", "runtime")}, {
+        "server-config": _child("Server configurations", {"*": server_config}),
+        "server": _child("Running servers", {"*": server}),
+    })
+    server_group = _resource("Server group", {"profile": _attr(), "socket-binding-group": _attr()}, add=True,
+                             extra_ops={"reload-servers": _op("reload-servers"), "restart-servers": _op("restart-servers")})
+
+    return _resource("The root node of the domain-level management model.", {
+        "name": _attr(),
+        "launch-type": _attr("STRING", "runtime"),
+        "product-name": _attr(),
+        "product-version": _attr(),
+        "release-version": _attr(),
+        "management-major-version": _attr("INT"),
+        "management-minor-version": _attr("INT"),
+        "management-micro-version": _attr("INT"),
+    }, {
+        "host": _child("Hosts", {"*": host}),
+        "server-group": _child("Server groups", {"*": server_group}),
+        "deployment": server["children"]["deployment"],
+    }, extra_ops={"composite": _op("composite", steps="LIST")})
+
+def build_domain_values(hosts: int = 2, servers: int = 2, deployments: int = 10, datasources: int = 10):
+    '''
+    Build values of domain with given number of hosts, each with given number of servers. Servers alternate between
+    'main-server-group' and 'other-server-group', and every host has one more server configuration that is stopped.
+    '''
+    standalone = build_values(deployments, datasources)
+    _hosts = {}
+    for h in range(hosts):
+        name = "master" if h == 0 else f"slave{h}"
+        configs, running = {}, {}
+        for i in range(servers):
+            server = f"server-{h}-{i}"
+            configs[server] = {"group": "main-server-group" if i % 2 == 0 else "other-server-group", "auto-start": True, "status": "STARTED"}
+            running[server] = dict(deepcopy(standalone), name=server, **{"launch-type": "DOMAIN"})
+        configs[f"server-{h}-stopped"] = {"group": "main-server-group", "auto-start": False, "status": "STOPPED"}
+        _hosts[name] = {"name": name, "master": h == 0, "server-config": configs, "server": running or None}
+
+    return {
+        "name": "mock-domain",
+        "launch-type": "DOMAIN",
+        "product-name": standalone["product-name"],
+        "product-version": standalone["product-version"],
+        "release-version": standalone["release-version"],
+        "management-major-version": standalone["management-major-version"],
+        "management-minor-version": standalone["management-minor-version"],
+        "management-micro-version": standalone["management-micro-version"],
+        "host": _hosts,
+        "server-group": {
+            "main-server-group": {"profile": "full", "socket-binding-group": "full-sockets"},
+            "other-server-group": {"profile": "full-ha", "socket-binding-group": "full-ha-sockets"},
+        },
+        "deployment": standalone["deployment"],
+    }
+
+class OperationFailed(Exception):
+    pass
+
+class MockModel:
+    '''
+    Holds description and values, and executes management operations against them.
+    '''
+    def __init__(self, deployments: int = 10, datasources: int = 10, hosts: int = 0, servers: int = 2):
+        if hosts:
+            self.description = build_domain_description()
+            self.values = build_domain_values(hosts, servers, deployments, datasources)
+        else:
+            self.description = build_description()
+            self.values = build_values(deployments, datasources)
+        self.logs = {"server.log": []}
+        self.reload_required = False
+        self.lock = threading.RLock()
+
+    # Address resolution
+    def _desc(self, address: list):
+        desc = self.description
+        for element in address:
+            (key, name), = element.items()
+            models = desc["children"][key]["model-description"]
+            desc = models.get(name) or models["*"]
+        return desc
+
+    def _node(self, address: list):
+        node = self.values
+        for element in address:
+            (key, name), = element.items()
+            if not isinstance(node, dict) or not isinstance(node.get(key), dict) or name not in node[key]:
+                raise OperationFailed(f"WFLYCTL0216: Management resource '{address}' not found")
+            node = node[key][name]
+        return node
+
+    def _expand(self, address: list):
+        '''
+        Expand wildcard addresses into list of concrete addresses.
+        '''
+        results = [[]]
+        for element in address:
+            (key, name), = element.items()
+            expanded = []
+            for base in results:
+                try:
+                    node = self._node(base)
+                except OperationFailed:
+                    continue
+                children = node.get(key) or {}
+                names = children.keys() if name == "*" else [name] if name in children else []
+                expanded.extend(base + [{key: n}] for n in names)
+            results = expanded
+        return results
+
+    @staticmethod
+    def _proxied(address: list, child_type: str, name: str = "*") -> bool:
+        '''
+        Slave hosts and running servers are proxies on domain controller, recursive reads leave them out unless
+        `proxies` is set.
+        '''
+        if child_type == "host" and not address:
+            return name != "master"
+        return child_type == "server" and len(address) == 1 and "host" in address[0]
+
+    def _read(self, address: list, node: dict, desc: dict, recursive: bool, include_runtime: bool, proxies: bool = False):
+        result = {}
+        for attr, attr_desc in desc["attributes"].items():
+            if attr_desc.get("storage") == "runtime" and not include_runtime:
+                continue
+            value = node.get(attr)
+            if address and address[-1].get("log-file") and attr == "file-size":
+                value = sum(len(l) + 1 for l in self.logs.get(address[-1]["log-file"], []))
+            result[attr] = value
+        for child_type, child in desc["children"].items():
+            children = node.get(child_type)
+            if not children:
+                result[child_type] = None
+                continue
+            if recursive:
+                result[child_type] = {}
+                for name, value in children.items():
+                    if not proxies and self._proxied(address, child_type, name):
+                        result[child_type][name] = None
+                        continue
+                    child_desc = child["model-description"].get(name) or child["model-description"]["*"]
+                    result[child_type][name] = self._read(address + [{child_type: name}], value, child_desc, recursive, include_runtime, proxies)
+            else:
+                result[child_type] = {name: None for name in children}
+        return result
+
+    def _describe(self, desc: dict, recursive: bool, operations: bool, proxies: bool = False, address: list = ()):
+        result = {"description": desc["description"], "attributes": desc["attributes"], "children": {}}
+        if operations:
+            result["operations"] = desc["operations"]
+        for child_type, child in desc["children"].items():
+            result["children"][child_type] = {"description": child["description"]}
+            if recursive:
+                # Running servers are described by servers themselves, which are reached only through proxies
+                if not proxies and child_type == "server" and self._proxied(list(address), child_type):
+                    result["children"][child_type]["model-description"] = {}
+                    continue
+                result["children"][child_type]["model-description"] = {name: self._describe(d, recursive, operations, proxies, list(address) + [{child_type: name}])
+                                                                      for name, d in child["model-description"].items()}
+        return result
+
+    def execute(self, op: dict):
+        '''
+        Execute single operation and return response dict.
+        '''
+        with self.lock:
+            try:
+                if op.get("operation") == "composite":
+                    return self._composite(op)
+                result = self._execute(op)
+            except OperationFailed as e:
+                return {"outcome": "failed", "failure-description": str(e), "rolled-back": True}
+            res = {"outcome": "success", "result": result}
+            if self.reload_required:
+                res["response-headers"] = {"process-state": "reload-required"}
+            return res
+
+    def _composite(self, op: dict):
+        snapshot = deepcopy(self.values)
+        steps = {}
+        failed = False
+        for i, step in enumerate(op.get("steps", []), 1):
+            try:
+                steps[f"step-{i}"] = {"outcome": "success", "result": self._execute(step)}
+            except OperationFailed as e:
+                steps[f"step-{i}"] = {"outcome": "failed", "failure-description": str(e)}
+                failed = True
+        rollback = op.get("operation-headers", {}).get("rollback-on-runtime-failure", True)
+        if failed:
+            if rollback:
+                self.values = snapshot
+                for step in steps.values():
+                    step["outcome"] = "failed"
+                    step["rolled-back"] = True
+            return {"outcome": "failed", "result": steps, "failure-description": {"WFLYCTL0062": "Composite operation failed and was rolled back." if rollback else "Composite operation failed."}, "rolled-back": bool(rollback)}
+        res = {"outcome": "success", "result": steps}
+        if self.reload_required:
+            res["response-headers"] = {"process-state": "reload-required"}
+        return res
+
+    def _execute(self, op: dict):
+        name = op.get("operation")
+        address = op.get("address") or []
+        if isinstance(address, dict):
+            address = [address]
+
+        # Description of wildcard address describes generic child, returned in same list form as wildcard reads
+        if name == "read-resource-description" and any("*" in element.values() for element in address):
+            try:
+                desc = self._desc(address)
+            except KeyError:
+                raise OperationFailed(f"WFLYCTL0030: No resource definition is registered for address {address}")
+            return [{"address": address, "outcome": "success", "result": self._describe(desc, op.get("recursive", False), op.get("operations", False), op.get("proxies", False), address)}]
+
+        # Wildcard reads return list of per-address results
+        if any("*" in element.values() for element in address):
+            if name not in ("read-resource", "read-attribute", "read-children-names"):
+                raise OperationFailed("WFLYCTL0212: Wildcard addresses are only supported for read operations")
+            results = []
+            for concrete in self._expand(address):
+                try:
+                    results.append({"address": concrete, "outcome": "success", "result": self._execute(dict(op, address=concrete))})
+                except OperationFailed as e:
+                    results.append({"address": concrete, "outcome": "failed", "failure-description": str(e)})
+            return results
+
+        params = {k: v for k, v in op.items() if k not in ("operation", "address", "operation-headers")}
+        if name == "add":
+            self.add(address, params)
+            return None
+        if name == "remove":
+            self.remove(address)
+            return None
+        if name == "full-replace-deployment":
+            address = [{"deployment": params["name"]}]
+            if params["name"] in (self.values.get("deployment") or {}):
+                self.remove(address)
+            self.add(address, {"name": params["name"], "runtime-name": params["name"], "enabled": params.get("enabled", False), "content": params.get("content")})
+            return None
+        if name in ("deploy", "undeploy"):
+            self._node(address)["enabled"] = name == "deploy"
+            return None
+        if name == "read-resource-description":
+            try:
+                desc = self._desc(address)
+            except KeyError:
+                raise OperationFailed(f"WFLYCTL0030: No resource definition is registered for address {address}")
+            return self._describe(desc, op.get("recursive", False), op.get("operations", False), op.get("proxies", False), address)
+        if name == "composite":
+            return self._composite(op)["result"]
+        if name in ("reload", "shutdown"):
+            if name == "reload":
+                self.reload_required = False
+                self.values["server-state"] = "running"
+            return None
+
+        node = self._node(address)
+        desc = self._desc(address)
+        if name == "read-resource":
+            return self._read(address, node, desc, op.get("recursive", False), op.get("include-runtime", False), op.get("proxies", False))
+        if name == "read-attribute":
+            attr = op.get("name")
+            if attr not in desc["attributes"]:
+                raise OperationFailed(f"WFLYCTL0201: Unknown attribute '{attr}'")
+            return self._read(address, node, desc, False, True).get(attr)
+        if name == "write-attribute":
+            attr = op.get("name")
+            if attr not in desc["attributes"]:
+                raise OperationFailed(f"WFLYCTL0201: Unknown attribute '{attr}'")
+            node[attr] = op.get("value")
+            if address and "data-source" in address[-1]:
+                self.reload_required = True
+                self.values["server-state"] = "reload-required"
+            return None
+        if name == "undefine-attribute":
+            node[op.get("name")] = None
+            return None
+        if name == "read-children-names":
+            child_type = op.get("child-type")
+            if child_type not in desc["children"]:
+                raise OperationFailed(f"WFLYCTL0205: No child type {child_type}")
+            return list((node.get(child_type) or {}).keys())
+        if name == "read-children-resources":
+            child_type = op.get("child-type")
+            if child_type not in desc["children"]:
+                raise OperationFailed(f"WFLYCTL0205: No child type {child_type}")
+            children = node.get(child_type) or {}
+            models = desc["children"][child_type]["model-description"]
+            return {child: self._read(address + [{child_type: child}], value, models.get(child) or models["*"], op.get("recursive", False), op.get("include-runtime", False), op.get("proxies", False))
+                    for child, value in children.items()}
+        if name == "read-log-file":
+            lines = self.logs.get(address[-1].get("log-file"), [])
+            count, skip = op.get("lines", 10), op.get("skip", 0)
+            if count < 0:
+                count = len(lines)
+            if op.get("tail", True):
+                end = len(lines) - skip
+                return lines[max(0, end - count):max(0, end)]
+            return lines[skip:skip + count]
+        raise OperationFailed(f"WFLYCTL0031: No operation named '{name}' exists at address {address}")
+
+    def add(self, address: list, params: dict):
+        parent = self._node(address[:-1])
+        (key, name), = address[-1].items()
+        try:
+            desc = self._desc(address)
+        except KeyError:
+            raise OperationFailed(f"WFLYCTL0175: No resource definition is registered for address {address}")
+        if isinstance(parent.get(key), dict) and name in parent[key]:
+            raise OperationFailed(f"WFLYCTL0212: Duplicate resource {address}")
+        value = {attr: params.get(attr) for attr in desc["attributes"]}
+        value.update({k: v for k, v in params.items() if k in desc["attributes"]})
+        for child_type in desc["children"]:
+            value[child_type] = None
+        if not isinstance(parent.get(key), dict):
+            parent[key] = {}
+        parent[key][name] = value
+
+    def remove(self, address: list):
+        parent = self._node(address[:-1])
+        (key, name), = address[-1].items()
+        self._node(address)
+        del parent[key][name]
+        if not parent[key]:
+            parent[key] = None
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, don't let Nagle's algorithm delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats["connections"] += 1
+
+    def _digest_ok(self):
+        header = self.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = {k: a or b for k, a, b in re.findall(r'(\w+)=(?:"([^"]*)"|([^\s,]*))', header[7:])}
+        nonce = fields.get("nonce")
+        if nonce not in self.server.nonces or fields.get("username") != self.server.username:
+            return False
+        ha1 = hashlib.md5(f"{self.server.username}:{REALM}:{self.server.password}".encode()).hexdigest()
+        ha2 = hashlib.md5(f"{self.command}:{fields.get('uri')}".encode()).hexdigest()
+        if fields.get("qop"):
+            expected = hashlib.md5(f"{ha1}:{nonce}:{fields.get('nc')}:{fields.get('cnonce')}:{fields.get('qop')}:{ha2}".encode()).hexdigest()
+        else:
+            expected = hashlib.md5(f"{ha1}:{nonce}:{ha2}".encode()).hexdigest()
+        return expected == fields.get("response")
+
+    def _challenge(self):
+        nonce = hashlib.md5(os.urandom(16)).hexdigest()
+        self.server.nonces.add(nonce)
+        with self.server.stats_lock:
+            self.server.stats["challenges"] += 1
+        self._drain()
+        self.send_response(401)
+        self.send_header("WWW-Authenticate", f'Digest realm="{REALM}", domain="/management", nonce="{nonce}", opaque="00000000000000000000000000000000", algorithm=MD5, qop="auth"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if not size:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _drain(self):
+        if not getattr(self, "_drained", False):
+            self._drained = True
+            self._body()
+
+    def _reply(self, status: int, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", "") and self.server.compress:
+            data = gzip.compress(data, 1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self._drained = False
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+        if not self._digest_ok():
+            return self._challenge()
+        body = self._body()
+        self._drained = True
+        if self.path.startswith("/management-upload"):
+            return self._upload(body)
+        op = json.loads(body)
+        with self.server.stats_lock:
+            self.server.stats["operations"] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        res = self.server.model.execute(op)
+        self._reply(200 if res["outcome"] == "success" else 500, res)
+
+    def _upload(self, body: bytes):
+        boundary = re.search(r'boundary=([^;]+)', self.headers.get("Content-Type", "")).group(1).strip('"').encode()
+        parts = body.split(b"--" + boundary)
+        operation, content = None, None
+        for part in parts[1:-1]:
+            headers, _, data = part.partition(b"\r\n\r\n")
+            data = data[:-2]
+            if b'name="operation"' in headers:
+                operation = json.loads(data)
+            else:
+                content = data
+        self.server.uploads.append(len(content or b""))
+        operation.pop("content", None)
+        if operation.get("operation") == "add":
+            operation["content"] = [{"hash": {"BYTES_VALUE": hashlib.sha1(content or b"").hexdigest()}}]
+        res = self.server.model.execute(operation)
+        self._reply(200 if res["outcome"] == "success" else 500, res)
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    '''
+    Mock WildFly management server. Use as context manager to run it in background thread:
+
+        >>> with MockServer(deployments=100) as server:
+        ...     jboss = JbossConnection(server.username, server.password, port=server.port)
+
+    :param port (optional, 0): Port to listen on, 0 picks free port
+    :param deployments (optional, 10): Number of synthetic deployments
+    :param datasources (optional, 10): Number of synthetic datasources
+    :param latency (optional, 0): Artificial per-operation server latency in seconds
+    :param compress (optional, True): Honor `Accept-Encoding: gzip` from clients
+    :param hosts (optional, 0): If set, server acts as domain controller of this many hosts
+    :param servers (optional, 2): Number of running servers per host in domain mode
+    '''
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, deployments: int = 10, datasources: int = 10, latency: float = 0, compress: bool = True, hosts: int = 0, servers: int = 2):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.model = MockModel(deployments, datasources, hosts, servers)
+        self.username = USERNAME
+        self.password = PASSWORD
+        self.latency = latency
+        self.compress = compress
+        self.nonces = set()
+        self.uploads = []
+        self.stats_lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "challenges": 0, "operations": 0}
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Mock WildFly management server")
+    parser.add_argument("--port", type=int, default=9990)
+    parser.add_argument("--deployments", type=int, default=10)
+    parser.add_argument("--datasources", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--hosts", type=int, default=0, help="Act as domain controller of this many hosts")
+    parser.add_argument("--servers", type=int, default=2, help="Running servers per host in domain mode")
+    args = parser.parse_args()
+    server = MockServer(args.port, args.deployments, args.datasources, args.latency, hosts=args.hosts, servers=args.servers)
+    print(f"Mock WildFly management listening on 127.0.0.1:{server.port} (user: {server.username}, password: {server.password})")
+    server.serve_forever()
@@ -18,6 +18,17 @@ res.raise_for_status()
 print("Checking remove() operation on path ['core-service']['management']['security-realm']['NewManagementRealm']")
 res: Call = jboss.root['core-service']['management']['security-realm']['NewManagementRealm'].operations.remove()
 
+print("Checking batch of add() and remove() operations on path ['core-service']['management']['security-realm']")
+with jboss.batch() as batch:
+    res_add = jboss.root['core-service']['management']['security-realm'].add('BatchRealmOne')
+    res_add_two = jboss.root['core-service']['management']['security-realm'].add('BatchRealmTwo')
+batch.raise_for_status()
+res_add.raise_for_status()
+with jboss.batch() as batch:
+    jboss.root['core-service']['management']['security-realm']['BatchRealmOne'].operations.remove()
+    jboss.root['core-service']['management']['security-realm']['BatchRealmTwo'].operations.remove()
+batch.raise_for_status()
+
 print("Checking for 'append' value on path subsystem.logging.periodic_rotating_file_handler.FILE: ", end='')
 res = jboss.root.subsystem.logging.periodic_rotating_file_handler.FILE.attributes['append']
 print(str(res))